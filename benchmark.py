@@ -0,0 +1,493 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from configparser import ConfigParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import mysql.connector as mysql
+
+import main as ingest
+import pipeline
+import upload_to_mysql as upload
+from column_profile import TableProfile
+from schema_registry import get_schema_registry
+
+# Routen, die der Mock-Server pro Commodity liefert
+ROUTES_PER_COMMODITY = 10
+SUITE_STAGES = ('fetch', 'process', 'routes')
+# Eigene Tabellennamen, damit die Suite keine echten Daten überschreibt
+BENCHMARK_PRICE_TABLE = 'benchmark_prices'
+BENCHMARK_ROUTE_ENDPOINT = 'benchmark_trade_routes'
+# Kennzahlen mit dieser Endung sind Durchsätze (größer ist besser), alle übrigen Zeiten
+THROUGHPUT_SUFFIX = '_per_s'
+
+class MockUexServer(ThreadingHTTPServer):
+    # Der Standard-Backlog von 5 würde parallele Verbindungsaufbauten verzögern
+    request_queue_size = 128
+    daemon_threads = True
+
+class MockUexHandler(BaseHTTPRequestHandler):
+    """Beantwortet UEX-Anfragen mit synthetischen Daten und künstlicher Latenz"""
+    protocol_version = 'HTTP/1.1'
+    # Header und Body werden getrennt geschrieben, Nagle würde jede Antwort verzögern
+    disable_nagle_algorithm = True
+    commodity_count = 100
+    latency = 0.05
+    # Vorab serialisierte Antworten großer Services, damit der Server nicht selbst zum Engpass wird
+    bodies = {}
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        url = urlparse(self.path)
+        endpoint = url.path.rstrip('/').rsplit('/', 1)[-1]
+        query = parse_qs(url.query)
+
+        if endpoint in self.bodies:
+            body = self.bodies[endpoint]
+        elif endpoint == 'commodities':
+            data = [{'id': i, 'name': f"Commodity {i}"} for i in range(1, self.commodity_count + 1)]
+            body = json.dumps({'status': 'ok', 'data': data}).encode('utf-8')
+        elif endpoint.endswith('trade_routes'):
+            id_commodity = int(query.get('id_commodity', ['0'])[0])
+            data = [
+                {'id_commodity': id_commodity, 'id_terminal_origin': i, 'id_terminal_destination': i + 1, 'profit': 1000.5 * i}
+                for i in range(1, ROUTES_PER_COMMODITY + 1)
+            ]
+            body = json.dumps({'status': 'ok', 'data': data}).encode('utf-8')
+        else:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@contextlib.contextmanager
+def mock_uex_server(commodity_count, latency, price_rows=0, record_padding=0):
+    """Startet einen lokalen Mock-UEX-Server und liefert dessen Basis-URL.
+    Mit price_rows liefert er zusätzlich commodities_prices_all mit so vielen synthetischen Datensätzen"""
+    bodies = {}
+    if price_rows:
+        bodies['commodities_prices_all'] = json.dumps({
+            'status': 'ok', 'data': synthetic_price_rows(price_rows, record_padding)
+        }).encode('utf-8')
+
+    handler = type('ConfiguredMockUexHandler', (MockUexHandler,), {
+        'commodity_count': commodity_count,
+        'latency': latency,
+        'bodies': bodies,
+    })
+    server = MockUexServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def build_configs(base_url):
+    """Erstellt API- und Routen-Konfiguration für den Mock-Server"""
+    config = ConfigParser()
+    config.read_dict({'api': {'base_url': base_url, 'token': 'benchmark', 'services': 'commodities'}})
+
+    routeconfig = ConfigParser()
+    routeconfig.read_dict({
+        'API': {'SERVICE_TRIGGER': 'commodities', 'ENDPOINT': 'trade_routes'},
+        'PARAMETERS': {'INVESTMENT': '1000000'},
+    })
+    return config, routeconfig
+
+def time_route_fetch(route_services, config, fetch_workers):
+    """Misst die Dauer für das Laden aller Routen über die Pipeline ohne Datenbank-Schreibvorgänge"""
+    def discard(route_service, uex_route_data):
+        if uex_route_data is None:
+            raise RuntimeError(f"Download von '{route_service}' fehlgeschlagen")
+
+    # Die Download-Ausgaben des Clients würden die Messung überfluten
+    with contextlib.redirect_stdout(io.StringIO()), ingest.uex.UexClient(config, pool_size=fetch_workers) as client:
+        stats = pipeline.run_pipeline('Benchmark', route_services, client.get, discard,
+                                      fetch_workers=fetch_workers, queue_size=fetch_workers)
+
+    if stats.failures:
+        raise RuntimeError(f"{len(stats.failures)} Routen-Downloads fehlgeschlagen")
+    return stats.wall_time
+
+def benchmark_routes(args):
+    """Vergleicht seriellen und parallelen Routen-Download gegen den Mock-Server"""
+    with mock_uex_server(args.commodities, args.latency) as base_url:
+        config, routeconfig = build_configs(base_url)
+        with contextlib.redirect_stdout(io.StringIO()):
+            commodities = ingest.uex.get_uex_data(routeconfig['API']['SERVICE_TRIGGER'], config)['data']
+        route_services = ingest.build_route_services(commodities, routeconfig)
+
+        serial = time_route_fetch(route_services, config, 1)
+        concurrent = time_route_fetch(route_services, config, args.concurrency)
+
+    print(f"Routen-Download für {len(route_services)} Commodities (Latenz {args.latency * 1000:.0f} ms):")
+    print(f"Seriell:               {serial:.2f} s")
+    print(f"Parallel ({args.concurrency:>3} Threads): {concurrent:.2f} s")
+    print(f"Beschleunigung:        {serial / concurrent:.1f}x")
+
+def synthetic_price_rows(count, padding=0):
+    """Erzeugt reproduzierbare Datensätze im Stil von commodities_prices_all, padding vergrößert jeden Datensatz"""
+    rows = [
+        {
+            'id': i,
+            'id_commodity': i % 150 + 1,
+            'id_terminal': i % 400 + 1,
+            'price_buy': round(1.5 + (i % 97) * 0.37, 2),
+            'price_sell': round(2.5 + (i % 89) * 0.41, 2),
+            'scu_buy': i % 5000,
+            'status_buy': i % 7,
+            'commodity_name': f"Commodity {i % 150 + 1}",
+            'terminal_name': f"Terminal {i % 400 + 1}",
+            'date_modified': 1700000000 + i
+        }
+        for i in range(1, count + 1)
+    ]
+    if padding:
+        for row in rows:
+            row['notes'] = 'x' * padding
+    return rows
+
+def time_insert(mydb, mySqlConfig, table_name, rows, insert):
+    """Legt die Benchmark-Tabelle neu an und misst nur das Einfügen inklusive Commit"""
+    registry = get_schema_registry(mySqlConfig['MYSQL_SERVER']['DATABASE'])
+    full_table_name = registry.full_name(table_name)
+    cursor = mydb.cursor()
+    registry.drop_table(cursor, table_name)
+
+    # Schema über den normalen Upload-Pfad aus dem Profil aller Datensätze anlegen, damit jede Spalte
+    # den ganzen Wertebereich aufnimmt; das Profilieren zählt nicht zur gemessenen Zeit
+    with contextlib.redirect_stdout(io.StringIO()):
+        upload.ensure_table_columns(cursor, registry, table_name, rows)
+
+    start = time.perf_counter()
+    inserted = insert(cursor, full_table_name, rows)
+    mydb.commit()
+    elapsed = time.perf_counter() - start
+
+    registry.drop_table(cursor, table_name)
+    cursor.close()
+    if inserted != len(rows):
+        raise RuntimeError(f"Nur {inserted} von {len(rows)} Datensätzen eingefügt")
+    return elapsed
+
+def benchmark_insert(args):
+    """Vergleicht zeilenweise und gebündelte INSERTs gegen die konfigurierte MySQL-Datenbank"""
+    _, mySqlConfig, _ = ingest.load_configs()
+    mydb = mysql.connect(
+        host=mySqlConfig['MYSQL_SERVER']['HOST'],
+        user=mySqlConfig['MYSQL_USER']['USERNAME'],
+        password=mySqlConfig['MYSQL_USER']['PASSWORD']
+    )
+    rows = synthetic_price_rows(args.rows)
+    columns = tuple(rows[0].keys())
+
+    def insert_per_row(cursor, full_table_name, rows):
+        prepared = [upload.prepare_values(row, columns) for row in rows]
+        return upload.insert_rows_individually(cursor, full_table_name, columns, prepared)
+
+    def insert_batched(cursor, full_table_name, rows):
+        columns, prepared = TableProfile().profile_rows(rows)
+        return upload.insert_rows(cursor, full_table_name, columns, prepared, args.batch_size)
+
+    try:
+        per_row = time_insert(mydb, mySqlConfig, args.table, rows, insert_per_row)
+        batched = time_insert(mydb, mySqlConfig, args.table, rows, insert_batched)
+    finally:
+        mydb.close()
+
+    print(f"INSERT von {len(rows)} Datensätzen in '{args.table}':")
+    print(f"Zeilenweise:           {per_row:.2f} s ({len(rows) / per_row:,.0f} Zeilen/s)")
+    print(f"Batches à {args.batch_size:<6}       {batched:.2f} s ({len(rows) / batched:,.0f} Zeilen/s)")
+    print(f"Beschleunigung:        {per_row / batched:.1f}x")
+
+def legacy_prepare_rows(data_list):
+    """Bisheriges Verfahren: Spalten sammeln, jede Spalte erneut über alle Zeilen typisieren,
+    danach jede Zeile einzeln aufbereiten"""
+    all_columns = {}
+    for item in data_list:
+        all_columns.update(dict.fromkeys(item.keys()))
+
+    column_types = {}
+    for column in all_columns:
+        types_found = set()
+        for item in data_list:
+            if column in item:
+                value = item[column]
+                if isinstance(value, bool):
+                    types_found.add('bool')
+                elif isinstance(value, int):
+                    types_found.add('int')
+                elif isinstance(value, float):
+                    types_found.add('float')
+                elif isinstance(value, (dict, list)):
+                    types_found.add('json')
+                else:
+                    types_found.add('text')
+        column_types[column] = types_found
+
+    groups = {}
+    for item in data_list:
+        columns = tuple(item.keys())
+        groups.setdefault(columns, []).append(upload.prepare_values(item, columns))
+    return column_types, groups
+
+def benchmark_profile(args):
+    """Vergleicht die bisherige mehrfache Spaltenanalyse mit dem einmaligen Profiling-Durchlauf (ohne Datenbank)"""
+    rows = synthetic_price_rows(args.rows)
+    for row in rows[::10]:
+        row['meta'] = {'source': 'benchmark', 'flags': [row['id'] % 2 == 0]}
+
+    timings = {}
+    for name, prepare in (('legacy', legacy_prepare_rows), ('single_pass', lambda data: TableProfile().profile_rows(data))):
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            prepare(rows)
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best
+
+    columns, prepared = TableProfile().profile_rows(rows)
+    print(f"Spaltenanalyse und Aufbereitung von {len(rows)} Datensätzen mit {len(columns)} Spalten (bester von {args.repeat} Läufen):")
+    print(f"Mehrere Durchläufe:    {timings['legacy']:.3f} s ({len(rows) / timings['legacy']:,.0f} Zeilen/s)")
+    print(f"Ein Durchlauf:         {timings['single_pass']:.3f} s ({len(rows) / timings['single_pass']:,.0f} Zeilen/s)")
+    print(f"Beschleunigung:        {timings['legacy'] / timings['single_pass']:.1f}x")
+
+def suite_fetch(config, args):
+    """Latenz und Durchsatz von get_uex_data für den großen Preis-Service"""
+    durations = []
+    payload = None
+    with contextlib.redirect_stdout(io.StringIO()), ingest.uex.UexClient(config) as client:
+        # Der erste Aufruf baut die Verbindung auf und wird nicht gewertet
+        for _ in range(args.repeat + 1):
+            start = time.perf_counter()
+            payload = ingest.uex.get_uex_data('commodities_prices_all', config, client)
+            durations.append(time.perf_counter() - start)
+            if payload is None:
+                raise RuntimeError("Download von 'commodities_prices_all' fehlgeschlagen")
+
+    seconds = statistics.median(durations[1:])
+    size = len(json.dumps(payload).encode('utf-8'))
+    return {
+        'latency_ms': seconds * 1000,
+        'records_per_s': len(payload['data']) / seconds,
+        'mb_per_s': size / 1_000_000 / seconds,
+    }
+
+def suite_process(mySqlConfig, args):
+    """Durchsatz von process_data_list beim vollständigen Neuladen einer Tabelle"""
+    rows = synthetic_price_rows(args.price_rows, args.record_padding)
+    registry = get_schema_registry(mySqlConfig['MYSQL_SERVER']['DATABASE'])
+
+    durations = []
+    with upload.open_connection(mySqlConfig) as mydb:
+        cursor = mydb.cursor()
+        registry.drop_table(cursor, BENCHMARK_PRICE_TABLE)
+        try:
+            for _ in range(args.repeat + 1):
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    upload.process_data_list(rows, mydb, mySqlConfig, BENCHMARK_PRICE_TABLE, True)
+                durations.append(time.perf_counter() - start)
+        finally:
+            registry.drop_table(cursor, BENCHMARK_PRICE_TABLE)
+            cursor.close()
+
+    # Der erste Lauf legt zusätzlich Tabelle und Spalten an
+    seconds = statistics.median(durations[1:])
+    return {
+        'first_load_s': durations[0],
+        'load_s': seconds,
+        'rows_per_s': len(rows) / seconds,
+    }
+
+def suite_routes(config, mySqlConfig, routeconfig, args):
+    """Durchsatz und Latenz der Routen-Schleife mit Download, Upload und Tabellentausch"""
+    settings = ingest.load_pipeline_settings(config, routeconfig, args.workers)
+    pool = upload.create_connection_pool(mySqlConfig, min_size=settings['db_workers'])
+    registry = get_schema_registry(mySqlConfig['MYSQL_SERVER']['DATABASE'])
+
+    durations = []
+    latencies = []
+    calls = 0
+    try:
+        for _ in range(args.repeat):
+            with contextlib.redirect_stdout(io.StringIO()), \
+                    ingest.uex.UexClient(config, pool_size=settings['fetch_workers']) as client:
+                start = time.perf_counter()
+                stats = ingest.ingest_routes(config, mySqlConfig, routeconfig, client, pool, settings)
+                durations.append(time.perf_counter() - start)
+                endpoint_stats = client.stats[BENCHMARK_ROUTE_ENDPOINT]
+
+            if stats.failures:
+                raise RuntimeError(f"{len(stats.failures)} Routen-Aufrufe fehlgeschlagen")
+            calls = stats.uploaded
+            latencies.append(endpoint_stats.total_latency / endpoint_stats.requests)
+    finally:
+        with upload.open_connection(mySqlConfig, pool) as mydb:
+            cursor = mydb.cursor()
+            for suffix in ('', upload.STAGING_SUFFIX, upload.OLD_SUFFIX):
+                registry.drop_table(cursor, f"{BENCHMARK_ROUTE_ENDPOINT}{suffix}")
+            cursor.close()
+        pool.close()
+
+    seconds = statistics.median(durations)
+    return {
+        'wall_s': seconds,
+        'calls_per_s': calls / seconds,
+        'routes_per_s': calls * ROUTES_PER_COMMODITY / seconds,
+        'latency_ms': statistics.median(latencies) * 1000,
+    }
+
+def print_suite_results(results):
+    print(f"\n{'Stufe':<10} {'Kennzahl':<16} {'Wert':>14}")
+    print("-" * 42)
+    for stage, metrics in results.items():
+        for name, value in metrics.items():
+            print(f"{stage:<10} {name:<16} {value:>14,.2f}")
+
+def compare_with_baseline(results, parameters, baseline, tolerance):
+    """Vergleicht mit einer gespeicherten Baseline und liefert die Kennzahlen, die sich um mehr als tolerance verschlechtert haben"""
+    if baseline.get('parameters') != parameters:
+        print(f"\nWarnung: Baseline wurde mit anderen Parametern erstellt: {baseline.get('parameters')}")
+
+    print(f"\nVergleich mit Baseline vom {baseline.get('created', '?')} (Toleranz {tolerance:.0%}):")
+    print(f"{'Stufe':<10} {'Kennzahl':<16} {'Baseline':>14} {'Aktuell':>14} {'Änderung':>10}")
+    print("-" * 80)
+    regressions = []
+    for stage, metrics in results.items():
+        for name, value in metrics.items():
+            base = baseline.get('results', {}).get(stage, {}).get(name)
+            if not base:
+                continue
+            change = (value - base) / base
+            # Bei Durchsätzen ist ein Rückgang schlechter, bei Zeiten ein Anstieg
+            slowdown = -change if name.endswith(THROUGHPUT_SUFFIX) else change
+            worse = slowdown > tolerance
+            better = slowdown < -tolerance
+            mark = "SCHLECHTER" if worse else "besser" if better else ""
+            print(f"{stage:<10} {name:<16} {base:>14,.2f} {value:>14,.2f} {change:>+10.1%}  {mark}")
+            if worse:
+                regressions.append(f"{stage}.{name}")
+    return regressions
+
+def benchmark_suite(args):
+    """End-to-End-Messung von Download, process_data_list und Routen-Schleife gegen Mock-Server und lokale Datenbank"""
+    stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    unknown = set(stages) - set(SUITE_STAGES)
+    if unknown:
+        raise SystemExit(f"Unbekannte Stufen: {', '.join(sorted(unknown))}, erlaubt sind {', '.join(SUITE_STAGES)}")
+
+    parameters = {
+        'commodities': args.commodities, 'latency': args.latency, 'price_rows': args.price_rows,
+        'record_padding': args.record_padding, 'repeat': args.repeat, 'workers': args.workers, 'stages': stages,
+    }
+    environment = {'python': platform.python_version(), 'platform': platform.platform()}
+
+    mySqlConfig = None
+    if 'process' in stages or 'routes' in stages:
+        _, mySqlConfig, _ = ingest.load_configs()
+        if args.database:
+            mySqlConfig['MYSQL_SERVER']['DATABASE'] = args.database
+        with upload.open_connection(mySqlConfig) as mydb:
+            environment['mysql'] = mydb.get_server_info()
+
+    results = {}
+    with mock_uex_server(args.commodities, args.latency, args.price_rows if 'fetch' in stages else 0, args.record_padding) as base_url:
+        config, routeconfig = build_configs(base_url)
+        routeconfig['API']['ENDPOINT'] = BENCHMARK_ROUTE_ENDPOINT
+        routeconfig['API']['CHECKPOINT'] = os.path.join(tempfile.gettempdir(), f"{BENCHMARK_ROUTE_ENDPOINT}.jsonl")
+
+        if 'fetch' in stages:
+            results['fetch'] = suite_fetch(config, args)
+        if 'process' in stages:
+            results['process'] = suite_process(mySqlConfig, args)
+        if 'routes' in stages:
+            results['routes'] = suite_routes(config, mySqlConfig, routeconfig, args)
+
+    print(f"Benchmark-Suite ({args.price_rows} Preis-Datensätze, {args.commodities} Commodities, "
+          f"Latenz {args.latency * 1000:.0f} ms, Median aus {args.repeat} Läufen)")
+    print_suite_results(results)
+
+    regressions = []
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as baseline_file:
+            regressions = compare_with_baseline(results, parameters, json.load(baseline_file), args.tolerance)
+    elif args.baseline:
+        print(f"\nBaseline '{args.baseline}' nicht gefunden, kein Vergleich")
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as baseline_file:
+            json.dump({
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'parameters': parameters,
+                'environment': environment,
+                'results': results,
+            }, baseline_file, indent=2)
+        print(f"\nBaseline nach '{args.save_baseline}' geschrieben")
+
+    if regressions:
+        print(f"\n{len(regressions)} Kennzahlen schlechter als die Baseline: {', '.join(regressions)}")
+        return 1
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks für den UEX-Datenimport")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    routes_parser = subparsers.add_parser('routes', help="Serieller vs. paralleler Routen-Download")
+    routes_parser.add_argument('--commodities', type=int, default=100)
+    routes_parser.add_argument('--latency', type=float, default=0.05, help="Antwortlatenz des Mock-Servers in Sekunden")
+    routes_parser.add_argument('--concurrency', type=int, default=16)
+    routes_parser.set_defaults(func=benchmark_routes)
+
+    insert_parser = subparsers.add_parser('insert', help="Zeilenweise vs. gebündelte INSERTs (benötigt Config/mySql.ini)")
+    insert_parser.add_argument('--rows', type=int, default=20000)
+    insert_parser.add_argument('--batch-size', type=int, default=1000)
+    insert_parser.add_argument('--table', default='benchmark_insert')
+    insert_parser.set_defaults(func=benchmark_insert)
+
+    profile_parser = subparsers.add_parser('profile', help="Mehrfache vs. einmalige Spaltenanalyse ohne Datenbank")
+    profile_parser.add_argument('--rows', type=int, default=100000)
+    profile_parser.add_argument('--repeat', type=int, default=3)
+    profile_parser.set_defaults(func=benchmark_profile)
+
+    suite_parser = subparsers.add_parser('suite', help="End-to-End-Suite mit Mock-Server und lokaler Datenbank, Vergleich mit Baseline")
+    suite_parser.add_argument('--stages', default=','.join(SUITE_STAGES), help="Kommagetrennt: fetch, process, routes")
+    suite_parser.add_argument('--commodities', type=int, default=100)
+    suite_parser.add_argument('--latency', type=float, default=0.005, help="Antwortlatenz des Mock-Servers in Sekunden")
+    suite_parser.add_argument('--price-rows', type=int, default=50000, help="Datensätze der synthetischen Preisliste")
+    suite_parser.add_argument('--record-padding', type=int, default=0, help="Zusätzliche Bytes pro Datensatz")
+    suite_parser.add_argument('--repeat', type=int, default=3)
+    suite_parser.add_argument('--workers', type=int, default=8)
+    suite_parser.add_argument('--database', help="Datenbank für die Benchmark-Tabellen (Standard: aus Config/mySql.ini)")
+    suite_parser.add_argument('--baseline', help="JSON-Datei einer früheren Messung zum Vergleich")
+    suite_parser.add_argument('--save-baseline', help="Ergebnis als neue Baseline speichern")
+    suite_parser.add_argument('--tolerance', type=float, default=0.1, help="Erlaubte Verschlechterung (0.1 = 10 %%)")
+    suite_parser.set_defaults(func=benchmark_suite)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,341 @@
+import json
+import math
+import re
+from datetime import date, datetime
+from itertools import chain, repeat
+
+NoneType = type(None)
+
+# Zeitstempel, die MySQL unverändert als DATETIME übernimmt
+DATETIME_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}')
+INTEGER_TYPES = (
+    ('TINYINT', -2**7, 2**7 - 1),
+    ('SMALLINT', -2**15, 2**15 - 1),
+    ('MEDIUMINT', -2**23, 2**23 - 1),
+    ('INT', -2**31, 2**31 - 1),
+    ('BIGINT', -2**63, 2**63 - 1),
+)
+# Gerundete Längen, damit leicht schwankende Daten nicht bei jedem Lauf eine Migration auslösen
+VARCHAR_SIZES = (16, 32, 64, 128, 255)
+# Kapazität in Bytes, utf8mb4 braucht bis zu 4 Bytes pro Zeichen
+TEXT_TYPES = (('TINYTEXT', 255), ('TEXT', 65535), ('MEDIUMTEXT', 16777215), ('LONGTEXT', 4294967295))
+ENUM_MAX_VALUES = 16
+ENUM_MIN_ROWS = 100
+ENUM_MAX_LENGTH = 32
+# Zahlenbereiche erhalten Luft nach oben, bevor ein größerer Typ nötig wird
+RANGE_HEADROOM = 2
+MIN_SCALE = 2
+MAX_SCALE = 6
+NUMERIC_KINDS = {'bool', 'int', 'float'}
+
+class ColumnProfile:
+    """Laufendes Profil der Werte einer Spalte: Typen, Zahlenbereich, Länge, Zeitstempel und verschiedene Werte"""
+
+    def __init__(self):
+        self.count = 0
+        self.kinds = set()
+        self.min_int = 0
+        self.max_int = 0
+        self.max_float = 0.0
+        self.max_scale = 0
+        self.max_length = 0
+        self.all_datetime = True
+        self.distinct = set()
+
+    def add(self, value):
+        self.add_values((value,))
+
+    def add_values(self, values):
+        """Schreibt das Profil mit allen Werten einer Spalte fort und liefert die gefundenen Python-Typen.
+        Die Auswertung läuft über Builtins wie set/map/min/max statt über einen Aufruf pro Wert"""
+        value_types = set(map(type, values))
+        if NoneType in value_types:
+            value_types.discard(NoneType)
+            values = [value for value in values if value is not None]
+        if not value_types:
+            return value_types
+        self.count += len(values)
+
+        for value_type in value_types:
+            typed = values if len(value_types) == 1 else [value for value in values if type(value) is value_type]
+            # Exakte Typvergleiche, bool ist eine Unterklasse von int und wird so nie als int gezählt
+            if value_type is int:
+                self.kinds.add('int')
+                self.add_integer_range(min(typed), max(typed))
+            elif value_type is float:
+                self.add_floats(typed)
+            elif value_type is str:
+                self.add_texts(typed)
+            elif value_type is bool:
+                self.kinds.add('bool')
+                self.add_integer_range(0, 1)
+            elif issubclass(value_type, (dict, list)):
+                self.kinds.add('json')
+            elif issubclass(value_type, (datetime, date)):
+                self.kinds.add('datetime')
+            elif issubclass(value_type, int):
+                self.kinds.add('int')
+                self.add_integer_range(int(min(typed)), int(max(typed)))
+            elif issubclass(value_type, float):
+                self.add_floats([float(value) for value in typed])
+            else:
+                self.add_texts([str(value) for value in typed])
+        return value_types
+
+    def add_integer_range(self, low, high):
+        self.min_int = min(self.min_int, low)
+        self.max_int = max(self.max_int, high)
+
+    def add_floats(self, values):
+        self.kinds.add('float')
+        magnitude = max(max(values), -min(values))
+        if magnitude > self.max_float and math.isfinite(magnitude):
+            self.max_float = magnitude
+        # Nachkommastellen nur für verschiedene Werte bestimmen, solange die Obergrenze nicht erreicht ist
+        if self.max_scale < MAX_SCALE:
+            for text in map(repr, set(values)):
+                dot = text.find('.')
+                scale = MAX_SCALE if dot < 0 or 'e' in text else len(text) - dot - 1
+                if scale > self.max_scale:
+                    self.max_scale = min(scale, MAX_SCALE)
+                    if self.max_scale == MAX_SCALE:
+                        break
+
+    def add_texts(self, values):
+        self.kinds.add('str')
+        self.max_length = max(self.max_length, max(map(len, values)))
+        if self.all_datetime and not all(map(DATETIME_PATTERN.fullmatch, values)):
+            self.all_datetime = False
+        if self.distinct is not None:
+            self.distinct.update(values)
+            if len(self.distinct) > ENUM_MAX_VALUES or max(map(len, self.distinct)) > ENUM_MAX_LENGTH:
+                self.distinct = None
+
+    def integer_digits(self):
+        return max(len(str(int(self.max_float))), len(str(abs(self.min_int))), len(str(abs(self.max_int))))
+
+    def text_length(self):
+        """Zeichen, die alle Werte als Text benötigen"""
+        length = self.max_length
+        if self.kinds & NUMERIC_KINDS:
+            length = max(length, self.integer_digits() + self.max_scale + 2)
+        if 'datetime' in self.kinds:
+            length = max(length, 26)
+        return length
+
+    def column_type(self):
+        """Kleinster passender MySQL-Typ für die bisher gesehenen Werte"""
+        kinds = self.kinds
+        if not kinds:
+            return 'TEXT'
+        if 'json' in kinds:
+            return 'JSON' if kinds == {'json'} else 'MEDIUMTEXT'
+        if kinds == {'bool'}:
+            return 'BOOLEAN'
+        if kinds <= {'bool', 'int'}:
+            return integer_type(self.min_int * RANGE_HEADROOM, self.max_int * RANGE_HEADROOM)
+        if kinds <= NUMERIC_KINDS:
+            return decimal_type(self.integer_digits() + 1, max(self.max_scale, MIN_SCALE))
+        if kinds <= {'str', 'datetime'} and self.all_datetime:
+            return 'DATETIME'
+        if kinds == {'str'} and self.count >= ENUM_MIN_ROWS and is_enum_candidate(self.distinct):
+            return enum_type(self.distinct)
+        return varchar_type(self.text_length())
+
+class TableProfile:
+    """Profile aller Spalten einer Tabelle, über beliebig viele Batches fortschreibbar"""
+
+    def __init__(self, data_list=()):
+        self.columns = {}
+        self.rows = 0
+        self.update(data_list)
+
+    def update(self, data_list):
+        self.profile_rows(data_list)
+        return self
+
+    def profile_rows(self, data_list):
+        """Profiliert die Datensätze und liefert sie zugleich als (spalten, zeilen): Spalten in der
+        Reihenfolge ihres ersten Auftretens, Zeilen als Tupel in Spaltenreihenfolge mit bereits
+        serialisierten JSON-Werten, fehlende Felder als None.
+        Die Arbeit pro Wert läuft in Builtins (map, zip, set, min/max) statt in Python-Schleifen"""
+        items = [item for item in data_list if isinstance(item, dict)]
+        columns = list(dict.fromkeys(chain.from_iterable(items)))
+        self.rows += len(items)
+        if not items:
+            return columns, []
+
+        column_values = []
+        for column in columns:
+            values = list(map(dict.get, items, repeat(column)))
+            profile = self.columns.get(column)
+            if profile is None:
+                profile = self.columns[column] = ColumnProfile()
+            value_types = profile.add_values(values)
+            if any(issubclass(value_type, (dict, list)) for value_type in value_types):
+                values = [json.dumps(value) if isinstance(value, (dict, list)) else value for value in values]
+            column_values.append(values)
+
+        # Spaltenweise gesammelt, für executemany und LOAD DATA zeilenweise zusammensetzen
+        return columns, list(zip(*column_values))
+
+def integer_type(low, high):
+    for name, type_low, type_high in INTEGER_TYPES:
+        if type_low <= low and high <= type_high:
+            return name
+    return 'DECIMAL(65,0)'
+
+def decimal_type(digits, scale):
+    scale = min(scale, MAX_SCALE)
+    return f"DECIMAL({min(digits + scale, 65)},{scale})"
+
+def varchar_type(length):
+    for size in VARCHAR_SIZES:
+        if length <= size:
+            return f"VARCHAR({size})"
+    return text_type(length)
+
+def text_type(length):
+    for name, capacity in TEXT_TYPES[1:]:
+        if length * 4 <= capacity:
+            return name
+    return 'LONGTEXT'
+
+def is_enum_candidate(values):
+    # ENUM vergleicht ohne Groß-/Kleinschreibung und entfernt Leerzeichen am Ende
+    if not values or '' in values:
+        return False
+    return len({value.lower() for value in values}) == len(values) and all(value == value.rstrip() for value in values)
+
+def enum_type(values):
+    quoted = ', '.join("'" + value.replace('\\', '\\\\').replace("'", "''") + "'" for value in sorted(values))
+    return f"ENUM({quoted})"
+
+def parse_column_type(column_type):
+    """Zerlegt einen MySQL-Spaltentyp in Familie und Parameter"""
+    normalized = column_type.strip().lower()
+    if normalized in ('tinyint(1)', 'boolean', 'bool'):
+        return ('bool',)
+
+    match = re.fullmatch(r'(tinyint|smallint|mediumint|int|integer|bigint)(\(\d+\))?( unsigned)?( zerofill)?', normalized)
+    if match:
+        name = 'INT' if match.group(1) == 'integer' else match.group(1).upper()
+        low, high = next((low, high) for type_name, low, high in INTEGER_TYPES if type_name == name)
+        if match.group(3):
+            low, high = 0, high * 2 + 1
+        return ('int', low, high)
+
+    match = re.fullmatch(r'(decimal|numeric)\((\d+)(?:,\s*(\d+))?\)( unsigned)?', normalized)
+    if match:
+        return ('decimal', int(match.group(2)), int(match.group(3) or 0))
+    if normalized.startswith(('float', 'double', 'real')):
+        return ('float',)
+
+    match = re.fullmatch(r'(var)?char\((\d+)\)', normalized)
+    if match:
+        return ('varchar', int(match.group(2)))
+    for name, capacity in TEXT_TYPES:
+        if normalized == name.lower():
+            return ('text', capacity // 4)
+
+    if normalized.startswith('enum('):
+        values = [value.replace("''", "'").replace('\\\\', '\\') for value in re.findall(r"'((?:[^']|'')*)'", column_type)]
+        return ('enum', values)
+    if normalized == 'json':
+        return ('json',)
+    if normalized == 'date' or normalized.startswith(('datetime', 'timestamp')):
+        return ('datetime',)
+    return ('other',)
+
+def type_capacity(parsed):
+    """Zeichen, die jeder Wert eines Typs als Text höchstens benötigt"""
+    family = parsed[0]
+    if family == 'bool':
+        return 4
+    if family == 'int':
+        return max(len(str(parsed[1])), len(str(parsed[2])))
+    if family == 'decimal':
+        return parsed[1] + 2
+    if family == 'float':
+        return 24
+    if family in ('varchar', 'text'):
+        return parsed[1]
+    if family == 'enum':
+        return max((len(value) for value in parsed[1]), default=1)
+    if family == 'datetime':
+        return 26
+    if family == 'json':
+        return TEXT_TYPES[2][1] // 4
+    return 255
+
+def fits(parsed, profile):
+    """Passen alle Werte des Profils ohne Verlust in den vorhandenen Typ?"""
+    family, kinds = parsed[0], profile.kinds
+    if family == 'other' or not kinds:
+        return True
+    if family == 'json':
+        return kinds == {'json'}
+    if family == 'text':
+        return profile.text_length() <= parsed[1]
+    if family == 'varchar':
+        return 'json' not in kinds and profile.text_length() <= parsed[1]
+    if family == 'enum':
+        return kinds == {'str'} and profile.distinct is not None and profile.distinct <= set(parsed[1])
+    if family == 'datetime':
+        return kinds <= {'str', 'datetime'} and profile.all_datetime
+    if family == 'bool':
+        return kinds <= {'bool', 'int'} and -128 <= profile.min_int and profile.max_int <= 127
+    if family == 'int':
+        return kinds <= {'bool', 'int'} and parsed[1] <= profile.min_int and profile.max_int <= parsed[2]
+    if family == 'decimal':
+        precision, scale = parsed[1], parsed[2]
+        return kinds <= NUMERIC_KINDS and profile.integer_digits() <= precision - scale and profile.max_scale <= scale
+    return kinds <= NUMERIC_KINDS
+
+def is_oversized(parsed, profile):
+    """Deutlich zu großer Typ: Text für kurze Zeichenketten oder Ganzzahl nur für Wahrheitswerte"""
+    if parsed[0] == 'text':
+        return profile.kinds == {'str'} and parse_column_type(profile.column_type())[0] in ('varchar', 'enum', 'datetime')
+    return parsed[0] == 'int' and profile.kinds == {'bool'}
+
+def resolve_column_type(current_type, profile, allow_shrink=False):
+    """Neuer Typ einer Spalte oder None, wenn der vorhandene Typ bleiben kann.
+    Zu kleine Typen werden verbreitert; deutlich zu große nur mit allow_shrink verkleinert, da das
+    Profil nur die neuen Werte kennt und vorhandene Zeilen sonst abgeschnitten würden"""
+    if current_type is None:
+        return profile.column_type()
+
+    current = parse_column_type(current_type)
+    if fits(current, profile):
+        return profile.column_type() if allow_shrink and is_oversized(current, profile) else None
+    return widen_column_type(current, profile)
+
+def widen_column_type(current, profile):
+    """Typ, der sowohl die vorhandenen Werte als auch die neuen des Profils aufnimmt"""
+    required = parse_column_type(profile.column_type())
+    numeric = ('bool', 'int', 'decimal', 'float')
+
+    if current[0] in numeric and required[0] in numeric:
+        families = {current[0], required[0]}
+        if 'float' in families:
+            return 'DOUBLE'
+        if 'decimal' in families:
+            digits = max(decimal_digits(current), decimal_digits(required))
+            scale = max(parsed[2] if parsed[0] == 'decimal' else 0 for parsed in (current, required))
+            return decimal_type(digits, scale)
+        low, high = zip(*(parsed[1:] if parsed[0] == 'int' else (-128, 127) for parsed in (current, required)))
+        return integer_type(min(low), max(high))
+
+    if current[0] == 'enum' and required[0] == 'enum':
+        values = set(current[1]) | set(required[1])
+        if len(values) <= ENUM_MAX_VALUES and is_enum_candidate(values):
+            return enum_type(values)
+    if current[0] == 'json' or required[0] == 'json':
+        return text_type(max(type_capacity(current), type_capacity(required)))
+
+    return varchar_type(max(type_capacity(current), type_capacity(required), profile.text_length()))
+
+def decimal_digits(parsed):
+    if parsed[0] == 'decimal':
+        return parsed[1] - parsed[2]
+    return type_capacity(parsed)
@@ -1,24 +1,133 @@
 import mysql.connector as mysql
 from configparser import ConfigParser
+import argparse
 import json
+import queue
+import threading
+import time
+import table_export
+
+# Eine Verbindung für die ganze Sitzung, statt die Konfiguration bei jedem Befehl neu zu lesen und neu zu verbinden
+_mysql_config = None
+_connection = None
+# Zuletzt ermittelte Tabellenstatistiken pro Modus (geschätzt/exakt) mit Zeitpunkt
+_stats_cache = {}
 
 def load_mysql_config():
     mysql_config = ConfigParser()
     mysql_config.read('Config/mySql.ini')
     return mysql_config
 
-def connect_to_db():
-    """Verbindung zur Datenbank herstellen"""
-    mysql_config = load_mysql_config()
-    
-    mydb = mysql.connect(
+def get_mysql_config():
+    """Liest die Konfiguration einmal pro Sitzung"""
+    global _mysql_config
+    if _mysql_config is None:
+        _mysql_config = load_mysql_config()
+    return _mysql_config
+
+def open_connection(mysql_config):
+    """Neue Verbindung zur Datenbank herstellen"""
+    return mysql.connect(
         host=mysql_config['MYSQL_SERVER']['HOST'],
         port=int(mysql_config['MYSQL_SERVER']['PORT']),
         user=mysql_config['MYSQL_USER']['USERNAME'],
         password=mysql_config['MYSQL_USER']['PASSWORD'],
-        database=mysql_config['MYSQL_SERVER']['DATABASE']
+        database=mysql_config['MYSQL_SERVER']['DATABASE'],
+        # Nicht vollständig gelesene kleine Ergebnisse blockieren die nächste Abfrage nicht
+        consume_results=True,
+        # Lesende Abfragen halten keine Transaktion offen: kein veralteter Snapshot und
+        # keine Metadaten-Sperren, die RENAME TABLE oder ALTER TABLE des Imports blockieren
+        autocommit=True
     )
-    return mydb
+
+def connect_to_db():
+    """Liefert die Verbindung der Sitzung und verbindet bei Bedarf automatisch neu"""
+    global _connection
+    if _connection is None:
+        _connection = open_connection(get_mysql_config())
+    else:
+        # Nach wait_timeout oder einem Serverneustart wird die Verbindung wiederhergestellt
+        _connection.ping(reconnect=True, attempts=3, delay=1)
+    return _connection
+
+def close_db():
+    """Schließt die Verbindung der Sitzung"""
+    global _connection
+    if _connection is not None:
+        try:
+            _connection.close()
+        except mysql.Error:
+            pass
+        _connection = None
+
+def abort_query(mydb):
+    """Bricht ein laufendes ungepuffertes Ergebnis ab und verwirft die Verbindung.
+    Ohne KILL QUERY würde das Schließen alle restlichen Zeilen vom Server lesen"""
+    global _connection
+    try:
+        killer = open_connection(get_mysql_config())
+        killer.cursor().execute(f"KILL QUERY {mydb.connection_id}")
+        killer.close()
+    except mysql.Error as e:
+        print(f"Fehler beim Abbrechen der Abfrage: {e}")
+    try:
+        mydb.close()
+    except mysql.Error:
+        pass
+    if _connection is mydb:
+        _connection = None
+
+def get_page_size():
+    """Zeilen pro Seite bei der Ausgabe großer Ergebnisse ([ACCESS] PAGE_SIZE)"""
+    return get_mysql_config().getint('ACCESS', 'PAGE_SIZE', fallback=100)
+
+def format_row(row):
+    formatted_row = []
+    for value in row:
+        if isinstance(value, str) and len(value) > 50:
+            formatted_row.append(value[:47] + "...")
+        else:
+            formatted_row.append(str(value))
+    return " | ".join(formatted_row)
+
+def print_rows(cursor, title, page_size, paged):
+    """Gibt ein Ergebnis seitenweise mit fetchmany aus, es liegt nie vollständig im Speicher.
+    Liefert die Anzahl Zeilen oder None, wenn die Ausgabe abgebrochen wurde"""
+    rows = cursor.fetchmany(page_size)
+    if not rows:
+        return 0
+
+    columns = [desc[0] for desc in cursor.description]
+    print(title)
+    print(" | ".join(columns))
+    print("-" * (len(" | ".join(columns))))
+
+    row_count = 0
+    while rows:
+        for row in rows:
+            print(format_row(row))
+        row_count += len(rows)
+
+        if paged and len(rows) == page_size:
+            answer = input(f"-- {row_count} Zeilen, Enter für weitere, 'q' zum Abbrechen -- ")
+            if answer.strip().lower() == 'q':
+                return None
+        rows = cursor.fetchmany(page_size)
+    return row_count
+
+def stream_rows(mydb, cursor, title, paged=False):
+    """Gibt das Ergebnis eines ungepufferten Cursors aus und bricht es bei 'q' oder Strg+C serverseitig ab"""
+    try:
+        row_count = print_rows(cursor, title, get_page_size(), paged)
+    except KeyboardInterrupt:
+        row_count = None
+
+    if row_count is None:
+        abort_query(mydb)
+        print("\nAusgabe abgebrochen.")
+    else:
+        cursor.close()
+    return row_count
 
 def show_tables():
     """Alle Tabellen anzeigen"""
@@ -33,65 +142,128 @@ def show_tables():
         print(f"- {table[0]}")
     
     cursor.close()
-    mydb.close()
 
-def show_table_stats():
-    """Zeigt Statistiken für alle Tabellen an (Anzahl Datensätze und Größe)"""
+def query_table_stats(cursor):
+    """Zeilen (geschätzt) und Größen aller Tabellen mit einer einzigen information_schema-Abfrage"""
+    cursor.execute("""
+        SELECT 
+            TABLE_NAME,
+            TABLE_ROWS,
+            ROUND((DATA_LENGTH / 1024 / 1024), 2) AS 'Data_MB',
+            ROUND((INDEX_LENGTH / 1024 / 1024), 2) AS 'Index_MB'
+        FROM information_schema.TABLES 
+        WHERE TABLE_SCHEMA = DATABASE() 
+        AND TABLE_TYPE = 'BASE TABLE'
+        ORDER BY TABLE_NAME
+    """)
+    return [
+        {'table': table, 'rows': rows, 'data_mb': data_mb or 0, 'index_mb': index_mb or 0, 'exact': False}
+        for table, rows, data_mb, index_mb in cursor.fetchall()
+    ]
+
+def count_rows_parallel(tables, workers):
+    """Exakte Zeilenzahl per COUNT(*), verteilt auf mehrere Verbindungen.
+    Jeder Worker hält eine eigene Verbindung und nimmt sich die nächste offene Tabelle"""
+    pending_tables = queue.Queue()
+    for table in tables:
+        pending_tables.put(table)
+    counts = {}
+    lock = threading.Lock()
+
+    def count_worker():
+        mydb = open_connection(get_mysql_config())
+        cursor = mydb.cursor()
+        try:
+            while True:
+                try:
+                    table = pending_tables.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    cursor.execute(f"SELECT COUNT(*) FROM {table}")
+                    row_count = cursor.fetchone()[0]
+                except mysql.Error as e:
+                    print(f"Fehler beim Zählen von '{table}': {e}")
+                    continue
+                with lock:
+                    counts[table] = row_count
+        finally:
+            cursor.close()
+            mydb.close()
+
+    threads = [threading.Thread(target=count_worker, name=f"count-{i}") for i in range(max(min(workers, len(tables)), 1))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counts
+
+def get_table_stats(exact=False):
+    """Tabellenstatistiken, für STATS_CACHE_SECONDS zwischengespeichert.
+    Mit exact werden alle Tabellen parallel gezählt, sonst nur die ohne Schätzwert"""
+    mysql_config = get_mysql_config()
+    cached = _stats_cache.get(exact)
+    if cached and time.monotonic() - cached[0] < mysql_config.getint('ACCESS', 'STATS_CACHE_SECONDS', fallback=30):
+        return cached[1]
+
     mydb = connect_to_db()
     cursor = mydb.cursor()
-    
+    stats = query_table_stats(cursor)
+    cursor.close()
+
+    # Die Zählungen großer Tabellen dauern am längsten und werden zuerst verteilt
+    to_count = [entry for entry in stats if exact or entry['rows'] is None]
+    to_count.sort(key=lambda entry: entry['data_mb'], reverse=True)
+    if to_count:
+        counts = count_rows_parallel([entry['table'] for entry in to_count],
+                                     mysql_config.getint('ACCESS', 'COUNT_WORKERS', fallback=4))
+        for entry in to_count:
+            if entry['table'] in counts:
+                entry['rows'] = counts[entry['table']]
+                entry['exact'] = True
+
+    _stats_cache[exact] = (time.monotonic(), stats)
+    return stats
+
+def invalidate_stats():
+    """Verwirft zwischengespeicherte Statistiken nach Änderungen an Daten oder Struktur"""
+    _stats_cache.clear()
+
+def show_table_stats(exact=False):
+    """Zeigt Statistiken für alle Tabellen an (Anzahl Datensätze und Größe)"""
     try:
-        # Hole alle Tabellen
-        cursor.execute("SHOW TABLES")
-        tables = [table[0] for table in cursor.fetchall()]
-        
-        if not tables:
-            print("Keine Tabellen gefunden.")
-            return
-        
-        print(f"\n{'Tabelle':<25} {'Datensätze':<12} {'Größe (MB)':<12} {'Index (MB)':<12} {'Gesamt (MB)':<12}")
-        print("-" * 85)
-        
-        total_rows = 0
-        total_data_size = 0
-        total_index_size = 0
-        
-        for table in tables:
-            # Hole Tabellenstatistiken
-            cursor.execute(f"""
-                SELECT 
-                    TABLE_ROWS,
-                    ROUND(((DATA_LENGTH + INDEX_LENGTH) / 1024 / 1024), 2) AS 'Total_MB',
-                    ROUND((DATA_LENGTH / 1024 / 1024), 2) AS 'Data_MB',
-                    ROUND((INDEX_LENGTH / 1024 / 1024), 2) AS 'Index_MB'
-                FROM information_schema.TABLES 
-                WHERE TABLE_SCHEMA = DATABASE() 
-                AND TABLE_NAME = '{table}'
-            """)
-            
-            result = cursor.fetchone()
-            if result:
-                rows, total_mb, data_mb, index_mb = result
-                
-                # Falls TABLE_ROWS NULL ist, zähle manuell
-                if rows is None:
-                    cursor.execute(f"SELECT COUNT(*) FROM {table}")
-                    rows = cursor.fetchone()[0]
-                
-                print(f"{table:<25} {rows:<12} {data_mb:<12} {index_mb:<12} {total_mb:<12}")
-                
-                total_rows += rows if rows else 0
-                total_data_size += data_mb if data_mb else 0
-                total_index_size += index_mb if index_mb else 0
-        
-        print("-" * 85)
-        print(f"{'GESAMT':<25} {total_rows:<12} {total_data_size:<12} {total_index_size:<12} {total_data_size + total_index_size:<12}")
-        
+        stats = get_table_stats(exact)
     except mysql.Error as e:
         print(f"Fehler beim Abrufen der Tabellenstatistiken: {e}")
-    
-    cursor.close()
-    mydb.close()
+        return
+    
+    if not stats:
+        print("Keine Tabellen gefunden.")
+        return
+    
+    print(f"\n{'Tabelle':<25} {'Datensätze':<12} {'Größe (MB)':<12} {'Index (MB)':<12} {'Gesamt (MB)':<12}")
+    print("-" * 85)
+    
+    total_rows = 0
+    total_data_size = 0
+    total_index_size = 0
+    
+    for entry in stats:
+        rows = entry['rows'] or 0
+        data_mb = entry['data_mb']
+        index_mb = entry['index_mb']
+        # Geschätzte Werte aus information_schema werden mit ~ gekennzeichnet
+        rows_str = str(rows) if entry['exact'] else f"~{rows}"
+        print(f"{entry['table']:<25} {rows_str:<12} {data_mb:<12} {index_mb:<12} {data_mb + index_mb:<12}")
+        
+        total_rows += rows
+        total_data_size += data_mb
+        total_index_size += index_mb
+    
+    print("-" * 85)
+    print(f"{'GESAMT':<25} {total_rows:<12} {total_data_size:<12} {total_index_size:<12} {total_data_size + total_index_size:<12}")
+    if not exact:
+        print("~ = Schätzwert aus information_schema, exakte Zählung mit 'stats --exact'")
 
 def show_detailed_table_stats(table_name):
     """Zeigt detaillierte Statistiken für eine spezifische Tabelle"""
@@ -172,55 +344,29 @@ def show_detailed_table_stats(table_name):
         print(f"Fehler beim Abrufen der Tabellenstatistiken: {e}")
 
     cursor.close()
-    mydb.close()
 
-def show_database_stats():
+def show_database_stats(exact=False):
     """Zeigt allgemeine Datenbankstatistiken"""
-    mydb = connect_to_db()
-    cursor = mydb.cursor()
-    
     try:
-        # Hole Datenbankstatistiken
-        cursor.execute("""
-            SELECT 
-                SCHEMA_NAME,
-                ROUND(SUM(((DATA_LENGTH + INDEX_LENGTH) / 1024 / 1024)), 2) AS 'Total_MB',
-                ROUND(SUM((DATA_LENGTH / 1024 / 1024)), 2) AS 'Data_MB',
-                ROUND(SUM((INDEX_LENGTH / 1024 / 1024)), 2) AS 'Index_MB',
-                COUNT(TABLE_NAME) AS 'Table_Count'
-            FROM information_schema.TABLES 
-            WHERE TABLE_SCHEMA = DATABASE()
-            GROUP BY SCHEMA_NAME
-        """)
-        
-        result = cursor.fetchone()
-        if result:
-            schema_name, total_mb, data_mb, index_mb, table_count = result
-            
-            print(f"\nDatenbankstatistiken für '{schema_name}':")
-            print("=" * 50)
-            print(f"Anzahl Tabellen:      {table_count}")
-            print(f"Gesamtgröße:          {total_mb} MB")
-            print(f"Daten:                {data_mb} MB")
-            print(f"Index:                {index_mb} MB")
-            
-            # Hole Zeilenanzahl für alle Tabellen
-            cursor.execute("SHOW TABLES")
-            tables = [table[0] for table in cursor.fetchall()]
-            
-            total_rows = 0
-            for table in tables:
-                cursor.execute(f"SELECT COUNT(*) FROM {table}")
-                rows = cursor.fetchone()[0]
-                total_rows += rows
-            
-            print(f"Gesamte Datensätze:   {total_rows:,}")
-            
+        stats = get_table_stats(exact)
     except mysql.Error as e:
         print(f"Fehler beim Abrufen der Datenbankstatistiken: {e}")
-    
-    cursor.close()
-    mydb.close()
+        return
+    
+    data_mb = sum(entry['data_mb'] for entry in stats)
+    index_mb = sum(entry['index_mb'] for entry in stats)
+    total_rows = sum(entry['rows'] or 0 for entry in stats)
+    
+    print(f"\nDatenbankstatistiken für '{get_mysql_config()['MYSQL_SERVER']['DATABASE']}':")
+    print("=" * 50)
+    print(f"Anzahl Tabellen:      {len(stats)}")
+    print(f"Gesamtgröße:          {round(data_mb + index_mb, 2)} MB")
+    print(f"Daten:                {round(data_mb, 2)} MB")
+    print(f"Index:                {round(index_mb, 2)} MB")
+    if all(entry['exact'] for entry in stats):
+        print(f"Gesamte Datensätze:   {total_rows:,}")
+    else:
+        print(f"Gesamte Datensätze:   ~{total_rows:,} (geschätzt)")
 
 def show_table_structure(table_name):
     """Struktur einer Tabelle anzeigen"""
@@ -237,7 +383,6 @@ def show_table_structure(table_name):
         print(f"{column[0]}\t\t{column[1]}\t\t{column[2]}\t{column[3]}\t{column[4]}")
     
     cursor.close()
-    mydb.close()
 
 def show_create_table(table_name):
     """CREATE TABLE Statement einer Tabelle anzeigen"""
@@ -252,7 +397,6 @@ def show_create_table(table_name):
     print(result[1])
     
     cursor.close()
-    mydb.close()
 
 def modify_table_column(table_name, column_name, new_definition):
     """Spalte einer Tabelle ändern"""
@@ -263,13 +407,13 @@ def modify_table_column(table_name, column_name, new_definition):
         query = f"ALTER TABLE {table_name} MODIFY COLUMN {column_name} {new_definition}"
         cursor.execute(query)
         mydb.commit()
+        invalidate_stats()
         print(f"Spalte '{column_name}' in Tabelle '{table_name}' erfolgreich geändert.")
         print(f"Neue Definition: {new_definition}")
     except mysql.Error as e:
         print(f"Fehler beim Ändern der Spalte: {e}")
     
     cursor.close()
-    mydb.close()
 
 def add_table_column(table_name, column_name, column_definition):
     """Neue Spalte zu einer Tabelle hinzufügen"""
@@ -280,12 +424,12 @@ def add_table_column(table_name, column_name, column_definition):
         query = f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_definition}"
         cursor.execute(query)
         mydb.commit()
+        invalidate_stats()
         print(f"Spalte '{column_name}' erfolgreich zur Tabelle '{table_name}' hinzugefügt.")
     except mysql.Error as e:
         print(f"Fehler beim Hinzufügen der Spalte: {e}")
     
     cursor.close()
-    mydb.close()
 
 def drop_table_column(table_name, column_name):
     """Spalte aus einer Tabelle entfernen"""
@@ -296,12 +440,12 @@ def drop_table_column(table_name, column_name):
         query = f"ALTER TABLE {table_name} DROP COLUMN {column_name}"
         cursor.execute(query)
         mydb.commit()
+        invalidate_stats()
         print(f"Spalte '{column_name}' erfolgreich aus Tabelle '{table_name}' entfernt.")
     except mysql.Error as e:
         print(f"Fehler beim Entfernen der Spalte: {e}")
     
     cursor.close()
-    mydb.close()
 
 def rename_table_column(table_name, old_column_name, new_column_name):
     """Spalte umbenennen"""
@@ -321,6 +465,7 @@ def rename_table_column(table_name, old_column_name, new_column_name):
             query = f"ALTER TABLE {table_name} CHANGE COLUMN {old_column_name} {new_column_name} {column_type} {is_nullable} {default_value}"
             cursor.execute(query)
             mydb.commit()
+            invalidate_stats()
             print(f"Spalte '{old_column_name}' erfolgreich zu '{new_column_name}' umbenannt.")
         else:
             print(f"Spalte '{old_column_name}' nicht gefunden.")
@@ -328,38 +473,16 @@ def rename_table_column(table_name, old_column_name, new_column_name):
         print(f"Fehler beim Umbenennen der Spalte: {e}")
     
     cursor.close()
-    mydb.close()
 
-def show_table_data(table_name, limit=10):
-    """Daten einer Tabelle anzeigen"""
+def show_table_data(table_name, limit=10, paged=False):
+    """Daten einer Tabelle anzeigen, auch große Limits werden ohne Zwischenspeicher gestreamt"""
     mydb = connect_to_db()
-    cursor = mydb.cursor()
+    cursor = mydb.cursor(buffered=False)
     
     cursor.execute(f"SELECT * FROM {table_name} LIMIT {limit}")
-    rows = cursor.fetchall()
-    
-    if rows:
-        # Spaltennamen holen
-        cursor.execute(f"SHOW COLUMNS FROM {table_name}")
-        columns = [column[0] for column in cursor.fetchall()]
-        
-        print(f"\nDaten aus Tabelle '{table_name}' (max. {limit} Zeilen):")
-        print(" | ".join(columns))
-        print("-" * (len(" | ".join(columns))))
-        
-        for row in rows:
-            formatted_row = []
-            for value in row:
-                if isinstance(value, str) and len(value) > 50:
-                    formatted_row.append(value[:47] + "...")
-                else:
-                    formatted_row.append(str(value))
-            print(" | ".join(formatted_row))
-    else:
+    row_count = stream_rows(mydb, cursor, f"\nDaten aus Tabelle '{table_name}' (max. {limit} Zeilen):", paged)
+    if row_count == 0:
         print(f"Tabelle '{table_name}' ist leer.")
-    
-    cursor.close()
-    mydb.close()
 
 def clear_table(table_name):
     """Alle Daten aus einer Tabelle löschen"""
@@ -373,13 +496,13 @@ def clear_table(table_name):
         
         cursor.execute(f"DELETE FROM {table_name}")
         mydb.commit()
+        invalidate_stats()
         
         print(f"Tabelle '{table_name}' geleert. {row_count} Zeilen gelöscht.")
     except mysql.Error as e:
         print(f"Fehler beim Leeren der Tabelle: {e}")
     
     cursor.close()
-    mydb.close()
 
 def clear_all_tables():
     """Alle Daten aus allen Tabellen löschen"""
@@ -408,6 +531,7 @@ def clear_all_tables():
                 print(f"Tabelle '{table}': {row_count} Zeilen gelöscht")
             
             mydb.commit()
+            invalidate_stats()
             print(f"\nAlle Tabellen geleert. Insgesamt {total_deleted} Zeilen gelöscht.")
         else:
             print("Vorgang abgebrochen.")
@@ -415,44 +539,67 @@ def clear_all_tables():
         print(f"Fehler beim Leeren der Tabellen: {e}")
     
     cursor.close()
-    mydb.close()
 
-def execute_custom_query(query):
-    """Benutzerdefinierte SQL-Abfrage ausführen"""
+def execute_custom_query(query, paged=False):
+    """Benutzerdefinierte SQL-Abfrage ausführen, Ergebnisse werden seitenweise gestreamt"""
     mydb = connect_to_db()
-    cursor = mydb.cursor()
+    cursor = mydb.cursor(buffered=False)
     
     try:
         cursor.execute(query)
         
-        if query.strip().upper().startswith('SELECT'):
-            rows = cursor.fetchall()
-            if rows:
-                # Spaltennamen holen
-                columns = [desc[0] for desc in cursor.description]
-                print(f"\nErgebnis ({len(rows)} Zeilen):")
-                print(" | ".join(columns))
-                print("-" * (len(" | ".join(columns))))
-                
-                for row in rows:
-                    formatted_row = []
-                    for value in row:
-                        if isinstance(value, str) and len(value) > 50:
-                            formatted_row.append(value[:47] + "...")
-                        else:
-                            formatted_row.append(str(value))
-                    print(" | ".join(formatted_row))
-            else:
+        if cursor.with_rows:
+            # stream_rows schließt den Cursor bzw. verwirft bei Abbruch die Verbindung
+            row_count = stream_rows(mydb, cursor, "\nErgebnis:", paged)
+            if row_count == 0:
                 print("Keine Daten gefunden.")
-        else:
-            mydb.commit()
-            print(f"Abfrage erfolgreich ausgeführt. {cursor.rowcount} Zeilen betroffen.")
+            elif row_count is not None:
+                print(f"({row_count} Zeilen)")
+            return
+        
+        mydb.commit()
+        invalidate_stats()
+        print(f"Abfrage erfolgreich ausgeführt. {cursor.rowcount} Zeilen betroffen.")
             
     except mysql.Error as e:
         print(f"Fehler bei der Abfrage: {e}")
     
     cursor.close()
-    mydb.close()
+
+def export_table(table_name, path, export_format='csv', where=None, compress=None):
+    """Exportiert eine Tabelle chunkweise über einen ungepufferten Cursor, auch wenn sie größer als der Arbeitsspeicher ist"""
+    # Ungültige Argumente ohne Abfrage ablehnen, sonst würde der Abbruch die laufende Abfrage beenden
+    table_export.check_export_args(export_format, compress)
+    
+    mydb = connect_to_db()
+    cursor = mydb.cursor(buffered=False)
+    
+    query = f"SELECT * FROM {table_name}"
+    if where:
+        query += f" WHERE {where}"
+    
+    start = time.perf_counter()
+    try:
+        cursor.execute(query)
+        row_count = table_export.export_rows(cursor, path, export_format,
+                                             get_mysql_config().getint('ACCESS', 'EXPORT_CHUNK_SIZE', fallback=10000), compress)
+    except (Exception, KeyboardInterrupt) as e:
+        # Die restlichen Zeilen sollen nicht mehr vom Server gelesen werden
+        abort_query(mydb)
+        print(f"Export abgebrochen: {e}" if str(e) else "Export abgebrochen.")
+        return
+    
+    cursor.close()
+    print(f"{row_count} Zeilen aus '{table_name}' nach '{path}' exportiert ({time.perf_counter() - start:.1f} s)")
+
+def parse_export_args(argv):
+    parser = argparse.ArgumentParser(prog="db_access.py export", description="Tabelle als CSV, JSONL oder Parquet exportieren")
+    parser.add_argument('table_name')
+    parser.add_argument('path')
+    parser.add_argument('--format', dest='export_format', choices=table_export.EXPORT_FORMATS, default='csv')
+    parser.add_argument('--where', help="Filter ohne das Schlüsselwort WHERE, z. B. \"investment = 1000000\"")
+    parser.add_argument('--compress', help="csv/jsonl: gzip, bz2, xz; parquet: snappy, gzip, zstd, brotli, lz4")
+    return parser.parse_args(argv)
 
 def interactive_mode():
     """Interaktiver Modus für SQL-Abfragen"""
@@ -469,8 +616,8 @@ def interactive_mode():
             elif command.lower() == 'help':
                 print("Verfügbare Befehle:")
                 print("- show tables")
-                print("- show stats")
-                print("- show database")
+                print("- show stats [exact]")
+                print("- show database [exact]")
                 print("- show detailed <table_name>")
                 print("- describe <table_name>")
                 print("- show create <table_name>")
@@ -485,10 +632,10 @@ def interactive_mode():
                 print("- quit")
             elif command.lower() == 'show tables':
                 show_tables()
-            elif command.lower() == 'show stats':
-                show_table_stats()
-            elif command.lower() == 'show database':
-                show_database_stats()
+            elif command.lower() in ('show stats', 'show stats exact'):
+                show_table_stats(command.lower().endswith(' exact'))
+            elif command.lower() in ('show database', 'show database exact'):
+                show_database_stats(command.lower().endswith(' exact'))
             elif command.lower().startswith('show detailed '):
                 table_name = command.split(' ', 2)[2]
                 show_detailed_table_stats(table_name)
@@ -528,15 +675,17 @@ def interactive_mode():
                 else:
                     print("Verwendung: rename column <table> <old_name> <new_name>")
             elif command.lower().startswith('select ') and 'from ' in command.lower():
-                execute_custom_query(command)
+                execute_custom_query(command, paged=True)
             elif command:
-                execute_custom_query(command)
+                execute_custom_query(command, paged=True)
                 
         except KeyboardInterrupt:
             print("\nBeendet.")
             break
         except Exception as e:
             print(f"Fehler: {e}")
+    
+    close_db()
 
 if __name__ == "__main__":
     import sys
@@ -547,9 +696,9 @@ if __name__ == "__main__":
         if command == "tables":
             show_tables()
         elif command == "stats":
-            show_table_stats()
+            show_table_stats('--exact' in sys.argv[2:])
         elif command == "database":
-            show_database_stats()
+            show_database_stats('--exact' in sys.argv[2:])
         elif command == "detailed" and len(sys.argv) > 2:
             show_detailed_table_stats(sys.argv[2])
         elif command == "structure" and len(sys.argv) > 2:
@@ -574,13 +723,19 @@ if __name__ == "__main__":
             rename_table_column(sys.argv[2], sys.argv[3], sys.argv[4])
         elif command == "query" and len(sys.argv) > 2:
             execute_custom_query(sys.argv[2])
+        elif command == "export" and len(sys.argv) > 3:
+            args = parse_export_args(sys.argv[2:])
+            try:
+                export_table(args.table_name, args.path, args.export_format, args.where, args.compress)
+            except (ValueError, RuntimeError) as e:
+                print(f"Fehler: {e}")
         elif command == "interactive":
             interactive_mode()
         else:
             print("Verwendung:")
             print("python db_access.py tables")
-            print("python db_access.py stats")
-            print("python db_access.py database")
+            print("python db_access.py stats [--exact]")
+            print("python db_access.py database [--exact]")
             print("python db_access.py detailed <table_name>")
             print("python db_access.py structure <table_name>")
             print("python db_access.py create <table_name>")
@@ -592,6 +747,9 @@ if __name__ == "__main__":
             print("python db_access.py drop <table> <column>")
             print("python db_access.py rename <table> <old_name> <new_name>")
             print("python db_access.py query \"SELECT * FROM table_name\"")
+            print("python db_access.py export <table> <path> [--format csv|jsonl|parquet] [--where <filter>] [--compress <codec>]")
             print("python db_access.py interactive")
     else:
-        interactive_mode() 
\ No newline at end of file
+        interactive_mode()
+    
+    close_db() 
\ No newline at end of file
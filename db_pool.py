@@ -0,0 +1,97 @@
+import queue
+import threading
+from contextlib import contextmanager
+
+class ConnectionPool:
+    """Einfacher MySQL-Verbindungspool mit Statistik über Checkouts, Wartezeiten und offene Verbindungen"""
+
+    def __init__(self, connect, size):
+        self.connect = connect
+        self.size = max(size, 1)
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(self.size)
+        self.lock = threading.Lock()
+
+        self.checkouts = 0
+        self.waits = 0
+        self.opened = 0
+        self.open_connections = 0
+
+    @contextmanager
+    def connection(self):
+        """Leiht eine Verbindung aus und gibt sie danach zuverlässig zurück"""
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.waits += 1
+            self.slots.acquire()
+
+        try:
+            mydb = self.take()
+        except Exception:
+            self.slots.release()
+            raise
+
+        with self.lock:
+            self.checkouts += 1
+
+        try:
+            yield mydb
+        except Exception:
+            # Halbfertige Transaktionen nicht an den nächsten Nutzer weitergeben
+            try:
+                mydb.rollback()
+            except Exception:
+                pass
+            raise
+        finally:
+            self.idle.put(mydb)
+            self.slots.release()
+
+    def take(self):
+        """Liefert eine freie, noch verbundene Verbindung oder öffnet eine neue"""
+        while True:
+            try:
+                mydb = self.idle.get_nowait()
+            except queue.Empty:
+                break
+
+            if mydb.is_connected():
+                return mydb
+            self.discard(mydb)
+
+        mydb = self.connect()
+        with self.lock:
+            self.opened += 1
+            self.open_connections += 1
+        return mydb
+
+    def discard(self, mydb):
+        try:
+            mydb.close()
+        except Exception:
+            pass
+        with self.lock:
+            self.open_connections -= 1
+
+    def close(self):
+        """Schließt alle freien Verbindungen"""
+        while True:
+            try:
+                self.discard(self.idle.get_nowait())
+            except queue.Empty:
+                break
+
+    def stats(self):
+        with self.lock:
+            return {
+                'size': self.size,
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'opened': self.opened,
+                'open_connections': self.open_connections
+            }
+
+    def print_stats(self):
+        stats = self.stats()
+        print(f"\nVerbindungspool: {stats['checkouts']} Checkouts, {stats['waits']} Wartevorgänge, "
+              f"{stats['opened']} Verbindungen geöffnet, {stats['open_connections']} offen (max. {stats['size']})")
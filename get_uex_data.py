@@ -1,24 +1,439 @@
 import requests
+from requests.adapters import HTTPAdapter
 import json
+import random
+import threading
+import time
 from datetime import datetime
+from email.utils import parsedate_to_datetime
+from uex_cache import ResponseCache
+from snapshot_archive import SnapshotArchive, TeeReader, is_archive_enabled
 
-def get_uex_data(service, config):
-    headers = {
-        'Authorization': f'Bearer {config['api']['token']}',
-        'Accept': 'application/json'
-    }
-    
+# brotli wird von urllib3 nur dekodiert, wenn das Paket installiert ist
+try:
+    import brotli
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+# ijson ist optional, ohne das Paket werden gestreamte Services komplett geparst und nur in Batches aufgeteilt
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Statuscodes, bei denen ein erneuter Versuch sinnvoll ist
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class TokenBucket:
+    """Thread-sicherer Token-Bucket, der zusätzlich vom Server verordnete Pausen einhält"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Wartet, bis ein Token verfügbar ist, und verbraucht es"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if self.rate > 0:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                wait = self.blocked_until - now
+                if wait <= 0:
+                    if self.rate <= 0:
+                        return
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Sperrt alle Anfragen für die angegebene Zeit (Retry-After, erschöpftes Kontingent)"""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.tokens = 0
+
+class EndpointStats:
+    """Latenz- und Retry-Statistik eines Endpunkts"""
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def record(self, latency):
+        self.requests += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+def parse_retry_after(value):
+    """Liest einen Retry-After-Header (Sekunden oder HTTP-Datum) in Sekunden"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max((parsedate_to_datetime(value) - datetime.now().astimezone()).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+def parse_quota_reset(value):
+    """Liest einen Reset-Header, der als Sekunden oder als Unix-Zeitpunkt kommen kann"""
     try:
+        reset = float(value)
+    except (TypeError, ValueError):
+        return None
+    # Große Werte sind ein absoluter Zeitpunkt und keine Wartezeit
+    if reset > 1_000_000_000:
+        reset -= time.time()
+    return max(reset, 0.0)
+
+def load_stream_services(config):
+    """Große Services werden gestreamt statt komplett in den Speicher geladen"""
+    return {service.strip() for service in config.get('api', 'stream_services', fallback='').split(',') if service.strip()}
+
+class RecordStream:
+    """Liest das data-Array einer Antwort inkrementell und liefert Batches fester Größe.
+    Mit einem Archiv werden die gelesenen Rohdaten nebenbei als Snapshot abgelegt"""
+
+    def __init__(self, response, service, batch_size, archive=None):
+        self.response = response
+        self.service = service
+        self.batch_size = max(batch_size, 1)
+        self.archive = archive
+
+    def batches(self):
+        writer = self.archive.writer(self.service) if self.archive is not None else None
+        try:
+            if ijson is None:
+                payload = self.response.json()
+                if writer is not None:
+                    writer.write(self.response.content)
+                records = iter(payload.get('data') or [])
+            else:
+                source = self.response.raw if writer is None else TeeReader(self.response.raw, writer)
+                records = ijson.items(source, 'data.item', use_float=True)
+
+            batch = []
+            for record in records:
+                batch.append(record)
+                if len(batch) >= self.batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+            if writer is not None:
+                if ijson is not None:
+                    source.drain()
+                writer.commit()
+                writer = None
+        finally:
+            # Abgebrochene Streams hinterlassen keinen unvollständigen Snapshot
+            if writer is not None:
+                writer.discard()
+            self.response.close()
+
+    def close(self):
+        self.response.close()
+
+class UexClient:
+    """Wiederverwendbarer UEX-API-Client mit gepoolter Keep-Alive-Session"""
+
+    def __init__(self, config, pool_size=1):
+        self.base_url = config['api']['base_url']
+        self.timeout = (
+            config.getfloat('api', 'connect_timeout', fallback=5),
+            config.getfloat('api', 'read_timeout', fallback=60)
+        )
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Authorization': f"Bearer {config['api']['token']}",
+            'Accept': 'application/json',
+            'Accept-Encoding': ACCEPT_ENCODING
+        })
+
+        # Ein Pool mit so vielen Verbindungen wie parallele Downloads laufen
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(pool_size, 1))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self.rate_limiter = TokenBucket(
+            config.getfloat('api', 'requests_per_second', fallback=0),
+            config.getint('api', 'burst', fallback=max(pool_size, 1))
+        )
+        self.max_retries = config.getint('api', 'max_retries', fallback=5)
+        self.backoff_base = config.getfloat('api', 'backoff_base', fallback=1)
+        self.backoff_max = config.getfloat('api', 'backoff_max', fallback=60)
+
+        self.cache = ResponseCache(config)
+        # Rohe Antworten für --replay archivieren ([archive] enabled)
+        self.archive = SnapshotArchive(config) if is_archive_enabled(config) else None
+
+        self.stream_services = load_stream_services(config)
+        self.stream_batch_size = config.getint('api', 'stream_batch_size', fallback=5000)
+
+        self.stats = {}
+        self.stats_lock = threading.Lock()
+
+    def get(self, service):
+        """Lädt einen Service und liefert die JSON-Antwort oder None bei Fehlern"""
+        return self.fetch(service)[0]
+
+    def fetch(self, service):
+        """Lädt einen Service und liefert (JSON-Antwort, aus_cache); bei Fehlern (None, False)"""
+        endpoint = service.split('?', 1)[0]
         print(f"\nVersuche Download von {service}...")
         print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        response = requests.get(f"{config['api']['base_url']}{service}", headers=headers)
-        response.raise_for_status()
 
-        return response.json()
+        entry = self.cache.load(service) if self.cache.enabled_for(service) else None
+        if entry is not None and self.cache.is_fresh(service, entry):
+            print(f"Cache-Treffer für {service}")
+            self.archive_payload(service, entry['payload'])
+            return entry['payload'], True
 
-    except requests.exceptions.RequestException as e:
-        print(f"Fehler beim Download von {service}: {e}")
-        return None
-    except Exception as e:
-        print(f"Fehler beim Download von {service}: {e}")
-        return None
\ No newline at end of file
+        headers = self.cache.conditional_headers(entry) if entry is not None else {}
+        response = self.request(service, headers)
+        if response is None:
+            return None, False
+
+        if response.status_code == 304 and entry is not None:
+            print(f"{service} unverändert (304), verwende Cache")
+            self.cache.touch(service, entry)
+            self.archive_payload(service, entry['payload'])
+            return entry['payload'], True
+
+        try:
+            payload = response.json()
+        except ValueError as e:
+            print(f"Fehler beim Download von {service}: {e}")
+            self.record_failure(endpoint)
+            return None, False
+
+        if self.cache.enabled_for(service):
+            self.cache.store(service, payload, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        if self.archive is not None:
+            self.archive.store(service, response.content)
+        return payload, False
+
+    def archive_payload(self, service, payload):
+        """Archiviert auch Antworten aus dem Cache, damit ein Replay den ganzen Lauf enthält"""
+        if self.archive is not None:
+            self.archive.store(service, json.dumps(payload).encode('utf-8'))
+
+    def is_streamed(self, service):
+        return service.split('?', 1)[0] in self.stream_services
+
+    def stream(self, service):
+        """Startet den Download eines Services und liefert einen RecordStream über sein data-Array oder None.
+        Gestreamte Services umgehen den Cache, damit der Speicherbedarf konstant bleibt"""
+        print(f"\nVersuche gestreamten Download von {service}...")
+        print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+        response = self.request(service, stream=True)
+        if response is None:
+            return None
+        # Komprimierte Antworten direkt beim Lesen dekodieren
+        response.raw.decode_content = True
+        return RecordStream(response, service, self.stream_batch_size, self.archive)
+
+    def request(self, service, headers=None, stream=False):
+        """Führt den HTTP-Request mit Rate-Limit und Retries aus und liefert die Antwort oder None"""
+        endpoint = service.split('?', 1)[0]
+
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            retry_after = None
+            start = time.monotonic()
+
+            try:
+                response = self.session.get(f"{self.base_url}{service}", headers=headers, timeout=self.timeout, stream=stream)
+                self.record_latency(endpoint, time.monotonic() - start)
+                self.apply_quota_headers(response)
+
+                if response.status_code in RETRY_STATUS_CODES:
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                    if retry_after is not None:
+                        self.rate_limiter.pause(retry_after)
+                    raise requests.exceptions.HTTPError(f"{response.status_code} für {service}", response=response)
+
+                response.raise_for_status()
+                return response
+
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout, requests.exceptions.HTTPError) as e:
+                status_code = e.response.status_code if e.response is not None else None
+                if e.response is not None:
+                    # Gestreamte Antworten halten sonst ihre Verbindung fest
+                    e.response.close()
+                retryable = status_code is None or status_code in RETRY_STATUS_CODES
+
+                if not retryable or attempt == self.max_retries:
+                    print(f"Fehler beim Download von {service}: {e}")
+                    self.record_failure(endpoint)
+                    return None
+
+                # Exponentielles Backoff mit vollem Jitter, Retry-After hat Vorrang
+                delay = retry_after if retry_after is not None else random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                print(f"Fehler beim Download von {service}: {e} - neuer Versuch in {delay:.1f} s")
+                self.record_retry(endpoint)
+                time.sleep(delay)
+
+            except requests.exceptions.RequestException as e:
+                print(f"Fehler beim Download von {service}: {e}")
+                self.record_failure(endpoint)
+                return None
+            except Exception as e:
+                print(f"Fehler beim Download von {service}: {e}")
+                self.record_failure(endpoint)
+                return None
+
+    def apply_quota_headers(self, response):
+        """Pausiert alle Anfragen, wenn das API-Kontingent laut Header aufgebraucht ist"""
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        if remaining is None:
+            return
+        try:
+            if int(float(remaining)) > 0:
+                return
+        except ValueError:
+            return
+
+        reset = parse_quota_reset(response.headers.get('X-RateLimit-Reset'))
+        if reset:
+            print(f"API-Kontingent erschöpft, pausiere {reset:.1f} s")
+            self.rate_limiter.pause(reset)
+
+    def endpoint_stats(self, endpoint):
+        with self.stats_lock:
+            return self.stats.setdefault(endpoint, EndpointStats())
+
+    def record_latency(self, endpoint, latency):
+        stats = self.endpoint_stats(endpoint)
+        with self.stats_lock:
+            stats.record(latency)
+
+    def record_retry(self, endpoint):
+        stats = self.endpoint_stats(endpoint)
+        with self.stats_lock:
+            stats.retries += 1
+
+    def record_failure(self, endpoint):
+        stats = self.endpoint_stats(endpoint)
+        with self.stats_lock:
+            stats.failures += 1
+
+    def print_stats(self):
+        """Gibt Latenz und Retries pro Endpunkt aus"""
+        print(f"\n{'Endpunkt':<30} {'Anfragen':<10} {'Retries':<10} {'Fehler':<10} {'Ø ms':<10} {'Max ms':<10}")
+        print("-" * 80)
+        with self.stats_lock:
+            for endpoint, stats in sorted(self.stats.items()):
+                avg_ms = stats.total_latency / stats.requests * 1000 if stats.requests else 0
+                print(f"{endpoint:<30} {stats.requests:<10} {stats.retries:<10} {stats.failures:<10} {avg_ms:<10.0f} {stats.max_latency * 1000:<10.0f}")
+
+    def close(self):
+        self.session.close()
+        if self.archive is not None:
+            self.archive.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class ArchivedResponse:
+    """Stellt einen archivierten Snapshot mit der Schnittstelle einer gestreamten Antwort bereit"""
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def json(self):
+        return json.load(self.raw)
+
+    def close(self):
+        self.raw.close()
+
+class ReplayClient(UexClient):
+    """Spielt die archivierten Antworten eines Laufs ein, ohne die UEX-API anzufragen.
+    Übernimmt Schnittstelle und Statistik von UexClient, baut aber keine HTTP-Session auf"""
+
+    def __init__(self, config, run_id):
+        self.run_id = run_id
+        self.snapshots = SnapshotArchive(config, run_id)
+        self.entries = self.snapshots.load_manifest(run_id)
+        print(f"Spiele Lauf {run_id} mit {len(self.entries)} archivierten Antworten ein")
+
+        # Kein Antwort-Cache: ein fehlgeschlagener Upload beim Einspielen darf die ETags des Live-Laufs nicht verwerfen
+        self.cache = None
+        self.archive = None
+        self.stream_services = load_stream_services(config)
+        self.stream_batch_size = config.getint('api', 'stream_batch_size', fallback=5000)
+
+        self.stats = {}
+        self.stats_lock = threading.Lock()
+
+    def open_snapshot(self, service):
+        """Öffnet den Snapshot eines Services als dekomprimierenden Datenstrom oder liefert None"""
+        endpoint = service.split('?', 1)[0]
+        entry = self.entries.get(service)
+        if entry is None:
+            print(f"Keine archivierte Antwort für {service} in Lauf {self.run_id}")
+            self.record_failure(endpoint)
+            return None
+        try:
+            return self.snapshots.open(entry)
+        except (OSError, RuntimeError) as e:
+            print(f"Fehler beim Lesen des Snapshots von {service}: {e}")
+            self.record_failure(endpoint)
+            return None
+
+    def fetch(self, service):
+        """Liefert (JSON-Antwort, False); eingespielte Daten gelten nie als unverändert, damit sie hochgeladen werden"""
+        start = time.monotonic()
+        snapshot = self.open_snapshot(service)
+        if snapshot is None:
+            return None, False
+
+        try:
+            with snapshot:
+                payload = json.load(snapshot)
+        except (OSError, ValueError) as e:
+            print(f"Fehler beim Lesen des Snapshots von {service}: {e}")
+            self.record_failure(service.split('?', 1)[0])
+            return None, False
+
+        self.record_latency(service.split('?', 1)[0], time.monotonic() - start)
+        return payload, False
+
+    def stream(self, service):
+        """Liest gestreamte Services direkt aus dem komprimierten Snapshot"""
+        snapshot = self.open_snapshot(service)
+        if snapshot is None:
+            return None
+        self.record_latency(service.split('?', 1)[0], 0.0)
+        return RecordStream(ArchivedResponse(snapshot), service, self.stream_batch_size)
+
+    def close(self):
+        pass
+
+def get_uex_data(service, config, client=None):
+    """Lädt einen Service über den gemeinsamen Client oder einen einmaligen Client"""
+    if client is not None:
+        return client.get(service)
+
+    with UexClient(config) as single_client:
+        return single_client.get(service)
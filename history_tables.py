@@ -0,0 +1,93 @@
+from datetime import date, datetime, timedelta
+from schema_registry import decode
+
+HISTORY_SUFFIX = '_history'
+SNAPSHOT_COLUMN = 'snapshot_time'
+FUTURE_PARTITION = 'p_future'
+# Zeitreihen werden fast immer pro Commodity, Fahrzeug oder Terminal abgefragt
+HISTORY_KEY_COLUMNS = ('id_commodity', 'id_vehicle', 'id_terminal')
+# Abstand zwischen Pythons Ordinalzahl und MySQLs TO_DAYS()
+TO_DAYS_OFFSET = 365
+
+def is_history_service(mySqlConfig, table_name):
+    services = mySqlConfig.get('HISTORY', 'SERVICES', fallback='').split(',')
+    return table_name in [service.strip() for service in services]
+
+def get_partition_period(mySqlConfig):
+    """Partitionierung pro Tag oder Monat ([HISTORY] PARTITION)"""
+    period = mySqlConfig.get('HISTORY', 'PARTITION', fallback='day').strip().lower()
+    if period not in ('day', 'month'):
+        raise ValueError(f"Unbekannte Partitionierung '{period}', erlaubt sind day und month")
+    return period
+
+def get_retention_days(mySqlConfig):
+    """Aufbewahrungsdauer in Tagen, 0 bewahrt alles auf"""
+    return mySqlConfig.getint('HISTORY', 'RETENTION_DAYS', fallback=0)
+
+def to_days(day):
+    """Entspricht MySQLs TO_DAYS() für ein Datum"""
+    return day.toordinal() + TO_DAYS_OFFSET
+
+def partition_for(snapshot_time, period):
+    """Name und (exklusive) Obergrenze der Partition, in die ein Snapshot fällt"""
+    day = snapshot_time.date() if isinstance(snapshot_time, datetime) else snapshot_time
+    if period == 'month':
+        start = day.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1)
+        return f"p{start:%Y%m}", end
+    return f"p{day:%Y%m%d}", day + timedelta(days=1)
+
+def ensure_history_table(mycursor, registry, table_name):
+    """Legt die Historientabelle nach Snapshot-Zeit RANGE-partitioniert an.
+    Der Partitionsschlüssel muss Teil des Primärschlüssels sein"""
+    registry.ensure_table(mycursor, table_name, (
+        f"(history_id BIGINT AUTO_INCREMENT, {SNAPSHOT_COLUMN} DATETIME NOT NULL, "
+        f"PRIMARY KEY (history_id, {SNAPSHOT_COLUMN})) "
+        f"PARTITION BY RANGE (TO_DAYS({SNAPSHOT_COLUMN})) "
+        f"(PARTITION {FUTURE_PARTITION} VALUES LESS THAN MAXVALUE)"
+    ))
+
+def get_partitions(mycursor, registry, table_name):
+    """Obergrenzen (TO_DAYS) aller Range-Partitionen außer p_future"""
+    mycursor.execute(
+        "SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL",
+        (registry.database, table_name)
+    )
+    return {
+        decode(name): int(decode(description))
+        for name, description in mycursor.fetchall()
+        if decode(name) != FUTURE_PARTITION
+    }
+
+def ensure_partition(mycursor, registry, table_name, snapshot_time, period):
+    """Spaltet die Partition des Snapshots aus p_future ab, bevor Daten hineingeschrieben werden"""
+    partitions = get_partitions(mycursor, registry, table_name)
+    partition_name, end = partition_for(snapshot_time, period)
+    # Ältere Snapshots landen ohnehin in einer bestehenden Partition
+    if partition_name in partitions or to_days(end) <= max(partitions.values(), default=0):
+        return
+
+    mycursor.execute(
+        f"ALTER TABLE {registry.full_name(table_name)} REORGANIZE PARTITION {FUTURE_PARTITION} INTO ("
+        f"PARTITION {partition_name} VALUES LESS THAN ({to_days(end)}), "
+        f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN MAXVALUE)"
+    )
+    print(f"Partition '{partition_name}' für Tabelle '{table_name}' angelegt")
+
+def drop_expired_partitions(mycursor, registry, table_name, retention_days, today=None):
+    """Entfernt Partitionen, die vollständig vor der Aufbewahrungsgrenze liegen, ohne DELETE"""
+    if retention_days <= 0:
+        return
+
+    cutoff = to_days((today or date.today()) - timedelta(days=retention_days))
+    expired = [name for name, end in get_partitions(mycursor, registry, table_name).items() if end <= cutoff]
+    if not expired:
+        return
+
+    mycursor.execute(f"ALTER TABLE {registry.full_name(table_name)} DROP PARTITION {', '.join(sorted(expired))}")
+    print(f"{len(expired)} abgelaufene Partitionen aus Tabelle '{table_name}' entfernt")
+
+def history_indexes(columns):
+    """Zusammengesetzte Indizes (Schlüsselspalte, Snapshot-Zeit) für die vorhandenen Schlüsselspalten"""
+    return [(column, SNAPSHOT_COLUMN) for column in HISTORY_KEY_COLUMNS if column in columns]
@@ -1,8 +1,14 @@
+import argparse
+import sys
 import mysql.connector as mysql
 from configparser import ConfigParser
 import get_uex_data as uex
 import upload_to_mysql as upload
+import pipeline
+import route_engine
+from route_checkpoint import RouteCheckpoint
 from datetime import datetime
+from urllib.parse import parse_qs, urlsplit
 
 def load_configs():
     config = ConfigParser()
@@ -14,35 +20,260 @@ def load_configs():
     routeconfig.read('Config/tradeRoutes.ini')
     return config, mysql_config, routeconfig
 
-def main():
+def load_investments(routeconfig):
+    """Investitionsstufen aus INVESTMENTS, ohne Liste die einzelne INVESTMENT"""
+    investments = routeconfig.get('PARAMETERS', 'INVESTMENTS', fallback=None) or routeconfig.get('PARAMETERS', 'INVESTMENT')
+    return [int(investment) for investment in investments.split(',') if investment.strip()]
+
+def build_route_services(commodities, routeconfig):
+    """Erstellt die Route-Service-Aufrufe für alle Commodities und Investitionsstufen. Die API wählt die
+    Top-Routen pro Investition aus, deshalb ein Aufruf je Stufe; MODE = local nutzt die Preisdaten für alle Stufen"""
+    route_endpoint = routeconfig['API']['ENDPOINT']
+    investments = load_investments(routeconfig)
+
+    return [
+        f"{route_endpoint}?id_commodity={commodity['id']}&investment={investment}"
+        for commodity in commodities
+        for investment in investments
+    ]
+
+def route_key(route_service):
+    """Liest Commodity und Investition aus einem Route-Service-Aufruf"""
+    params = parse_qs(urlsplit(route_service).query)
+    return int(params['id_commodity'][0]), int(params['investment'][0])
+
+def load_pipeline_settings(config, routeconfig, workers=None):
+    """Anzahl Download- und Schreib-Worker sowie Größe der Queue dazwischen.
+    workers (--workers) überschreibt beide Worker-Anzahlen aus der Konfiguration"""
+    settings = {
+        'fetch_workers': routeconfig.getint('PARAMETERS', 'MAX_CONCURRENCY', fallback=1),
+        'db_workers': config.getint('pipeline', 'db_workers', fallback=2),
+        'queue_size': config.getint('pipeline', 'queue_size', fallback=4)
+    }
+    if workers:
+        settings['fetch_workers'] = settings['db_workers'] = workers
+        settings['queue_size'] = max(settings['queue_size'], workers)
+    return settings
+
+def ingest_services(config, mySqlConfig, client, pool, pipeline_settings, collected=None):
+    """Lädt alle konfigurierten Services und schreibt sie in die Datenbank.
+    Für Services, die als Schlüssel in collected stehen, werden die Daten dort abgelegt"""
+    def fetch_service(service):
+        # Gestreamte Services werden erst vom Schreib-Worker gelesen
+        if client.is_streamed(service):
+            return client.stream(service), False
+        return client.fetch(service)
+
+    def upload_service(service, result):
+        uex_service_data, from_cache = result
+        if uex_service_data is None:
+            raise RuntimeError(f"Download von '{service}' fehlgeschlagen")
+
+        if isinstance(uex_service_data, uex.RecordStream):
+            batches = uex_service_data.batches()
+            if collected is not None and service in collected:
+                collected[service] = []
+                batches = collect_fields(batches, collected[service], route_engine.SOURCE_FIELDS[service])
+            try:
+                upload.upload_stream(batches, mySqlConfig, service, pool)
+            except Exception:
+                # Ein abgebrochener Stream liefert keine vollständigen Daten für die Routenberechnung
+                if collected is not None and service in collected:
+                    collected[service] = None
+                raise
+            return
+
+        if collected is not None and service in collected:
+            collected[service] = uex_service_data.get('data', [])
+
+        # Unveränderte Daten stehen bereits in der Datenbank
+        if from_cache:
+            print(f"'{service}' unverändert, Upload übersprungen")
+            return
+
+        try:
+            upload.upload_to_mysql(uex_service_data, mySqlConfig, service, pool)
+        except Exception:
+            # Sonst würde der nächste Lauf den fehlgeschlagenen Upload als aktuell ansehen
+            if client.cache is not None:
+                client.cache.invalidate(service)
+            raise
+
+    services = config['api']['services'].split(',')
+    stats = pipeline.run_pipeline('Services', services, fetch_service, upload_service, **pipeline_settings)
+    stats.print_report()
+    stats.print_job_report()
+    return stats
+
+def collect_fields(batches, rows, fields):
+    """Reicht die Batches durch und behält von jedem Datensatz nur die angegebenen Felder"""
+    for batch in batches:
+        rows.extend({field: item.get(field) for field in fields} for item in batch)
+        yield batch
+
+def ingest_routes(config, mySqlConfig, routeconfig, client, pool, pipeline_settings, resume=False):
+    """Lädt die Top-Routen aller Commodities und tauscht die Routentabelle erst aus, wenn alle Aufrufe gelungen sind.
+    Mit resume wird ein abgebrochener Lauf anhand seines Checkpoints fortgesetzt"""
+    uex_commodities = uex.get_uex_data(routeconfig['API']['SERVICE_TRIGGER'], config, client)
+    route_endpoint = routeconfig['API']['ENDPOINT']
+
+    if uex_commodities is None:
+        print("Keine Commodities erhalten, Routenberechnung übersprungen")
+        return None
+
+    def upload_route(route_service, uex_route_data):
+        if uex_route_data is None:
+            raise RuntimeError(f"Download von '{route_service}' fehlgeschlagen")
+
+        # Jede Route trägt ihre Investitionsstufe, damit alle Stufen in einer Tabelle liegen
+        _, investment = route_key(route_service)
+        routes = uex_route_data.get('data') or []
+        for route in [routes] if isinstance(routes, dict) else routes:
+            route.setdefault('investment', investment)
+        upload.upload_route_data(uex_route_data, mySqlConfig, route_endpoint, False, pool)
+        checkpoint.mark_done(route_service)
+
+    route_services = build_route_services(uex_commodities['data'], routeconfig)
+    checkpoint = RouteCheckpoint(routeconfig.get('API', 'CHECKPOINT', fallback='Checkpoints/trade_routes.jsonl'))
+    pending_services = route_services
+
+    # Auch ein Fehler beim Fortsetzen oder Anlegen der Staging-Tabelle schließt den Checkpoint
+    try:
+        resumed = False
+        if resume and checkpoint.load() and checkpoint.table_name == route_endpoint:
+            pending_services = [route_service for route_service in route_services if route_service not in checkpoint.completed]
+            resumed = upload.resume_route_upload(mySqlConfig, route_endpoint, [route_key(route_service) for route_service in pending_services], pool)
+            if resumed:
+                print(f"Setze Lauf {checkpoint.run_id} fort: {len(route_services) - len(pending_services)} Aufrufe erledigt, {len(pending_services)} offen")
+                checkpoint.resume()
+            else:
+                print(f"Staging-Tabelle von Lauf {checkpoint.run_id} nicht mehr vorhanden, starte neu")
+                pending_services = route_services
+        elif resume:
+            print("Kein passender Checkpoint gefunden, starte neu")
+
+        if not resumed:
+            # Die Staging-Tabelle wird vorab angelegt, damit alle Schreib-Worker nur anhängen
+            checkpoint.start(route_endpoint)
+            upload.begin_route_upload(mySqlConfig, route_endpoint, pool)
+
+        stats = pipeline.run_pipeline('Routen', pending_services, client.get, upload_route, **pipeline_settings)
+    finally:
+        checkpoint.close()
+    stats.print_report()
+    # Bei tausenden Routen-Aufrufen nur die fehlgeschlagenen einzeln auflisten
+    stats.print_job_report(show_succeeded=False)
+
+    # Die Live-Tabelle wird erst getauscht, wenn alle Commodities dieses Laufs geladen sind
+    if stats.failures:
+        print(f"Nicht alle Routen geladen, '{route_endpoint}' bleibt unverändert. Fortsetzen mit: python main.py --resume")
+    elif checkpoint.completed:
+        upload.publish_route_data(mySqlConfig, route_endpoint, pool)
+        checkpoint.remove()
+    return stats
+
+def ingest_local_routes(mySqlConfig, routeconfig, client, pool, collected):
+    """Berechnet die Routen lokal aus den Preisdaten statt einem API-Aufruf pro Commodity"""
+    route_endpoint = routeconfig['API']['ENDPOINT']
+    investments = load_investments(routeconfig)
+    top_routes = routeconfig.getint('PARAMETERS', 'TOP_ROUTES', fallback=10)
+
+    # Nicht konfigurierte Quell-Services einmalig nachladen
+    for service in route_engine.SOURCE_SERVICES:
+        if collected.get(service) is None:
+            uex_service_data = client.get(service)
+            collected[service] = uex_service_data.get('data', []) if uex_service_data else None
+
+    if collected['commodities_prices_all'] is None:
+        print("Keine Preisdaten erhalten, Routenberechnung übersprungen")
+        return None
+
+    routes = route_engine.compute_routes(collected['commodities_prices_all'], investments, top_routes, collected['terminals'])
+    print(f"{len(routes)} Routen für {len(investments)} Investitionsstufen lokal berechnet")
+    # Alle Routen gehen in einem Upload in die frische Staging-Tabelle
+    upload.upload_route_data({'data': routes}, mySqlConfig, route_endpoint, True, pool)
+    upload.publish_route_data(mySqlConfig, route_endpoint, pool)
+    return len(routes)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Lädt die UEX-Daten und Handelsrouten in die MySQL-Datenbank")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Parallele Download- und Schreib-Worker für Services und Routen (überschreibt die Konfiguration)")
+    parser.add_argument('--resume', action='store_true',
+                        help="Setzt einen abgebrochenen Routen-Lauf anhand seines Checkpoints fort")
+    parser.add_argument('--replay', metavar='RUN_ID',
+                        help="Spielt die archivierten API-Antworten eines Laufs ein, statt die UEX-API anzufragen")
+    return parser.parse_args(argv)
+
+def run_stage(name, failures, stage, *args):
+    """Führt einen Schritt aus; Fehler werden gemeldet, ohne die übrigen Schritte abzubrechen"""
+    try:
+        return stage(*args)
+    except Exception as e:
+        print(f"Fehler in '{name}': {e}")
+        failures[name] = str(e)
+        return None
+
+def main(argv=None):
+    args = parse_args(argv)
     timestamp_begin = datetime.now()
     config, mySqlConfig, routeconfig = load_configs()
     print(config['api']['services'])
     print(mySqlConfig['MYSQL_SERVER']['HOST'])
 
-    for service in config['api']['services'].split(','):
-        print(service)
-        uex_service_data = uex.get_uex_data(service, config)
-        upload.upload_to_mysql(uex_service_data, mySqlConfig, service)
+    # Ein gemeinsamer Client für den ganzen Lauf, Pool so groß wie die Parallelität
+    pipeline_settings = load_pipeline_settings(config, routeconfig, args.workers)
+    if args.replay:
+        try:
+            client = uex.ReplayClient(config, args.replay)
+        except ValueError as e:
+            print(f"Fehler: {e}")
+            return 1
+    else:
+        client = uex.UexClient(config, pool_size=pipeline_settings['fetch_workers'])
+    # Ein gemeinsamer Datenbank-Pool mit mindestens einer Verbindung pro Schreib-Worker
+    pool = upload.create_connection_pool(mySqlConfig, min_size=pipeline_settings['db_workers'])
 
-    # Hole top Routen für alle Commodities
-    uex_commodities = uex.get_uex_data(routeconfig['API']['SERVICE_TRIGGER'], config)
-    firstRun = True
+    # Im lokalen Modus werden die Routen aus den ohnehin geladenen Preisdaten berechnet
+    local_routes = routeconfig.get('API', 'MODE', fallback='api') == 'local'
+    collected = dict.fromkeys(route_engine.SOURCE_SERVICES) if local_routes else None
+    if args.resume and local_routes:
+        print("Warnung: --resume gilt nur für MODE = api, die lokale Routenberechnung startet immer neu")
 
-    for commodity in uex_commodities['data']:
-        route_endpoint = routeconfig['API']['ENDPOINT']
-        commodity_id = commodity['id']
-        investment = routeconfig['PARAMETERS']['INVESTMENT']
+    failures = {}
+    try:
+        service_stats = run_stage('Services', failures, ingest_services, config, mySqlConfig, client, pool, pipeline_settings, collected)
+        if service_stats is not None:
+            failures.update(service_stats.failures)
 
-        route_service = f"{route_endpoint}?id_commodity={commodity_id}&investment={investment}"
-        uex_route_data = uex.get_uex_data(route_service, config)
-        upload.upload_route_data(uex_route_data, mySqlConfig, route_endpoint, firstRun)
-        firstRun = False
+        # Hole top Routen für alle Commodities
+        if local_routes:
+            route_count = run_stage('Routen', failures, ingest_local_routes, mySqlConfig, routeconfig, client, pool, collected)
+            if route_count is None:
+                failures.setdefault('Routen', "Keine Routen berechnet")
+        else:
+            route_stats = run_stage('Routen', failures, ingest_routes, config, mySqlConfig, routeconfig, client, pool, pipeline_settings, args.resume)
+            if route_stats is None:
+                failures.setdefault('Routen', "Keine Commodities erhalten")
+            elif route_stats.failures:
+                failures['Routen'] = f"{len(route_stats.failures)} von {len(route_stats.failures) + route_stats.uploaded} Routen-Aufrufen fehlgeschlagen"
+    finally:
+        client.print_stats()
+        pool.print_stats()
+        client.close()
+        pool.close()
 
     timestamp_end = datetime.now()
     print(f"Ich habe {timestamp_end - timestamp_begin} gebraucht")
     print(f"Begonnen: {timestamp_begin}")
     print(f"Ende: {timestamp_end}")
 
+    if failures:
+        print(f"\nLauf mit {len(failures)} Fehlern beendet:")
+        for name, error in failures.items():
+            print(f"  {name}: {error}")
+        return 1
+    return 0
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,127 @@
+import queue
+import threading
+import time
+
+# Signalisiert den Schreib-Workern, dass keine Daten mehr kommen
+_DONE = object()
+
+class PipelineStats:
+    """Durchsatz, Zeit pro Stufe und Queue-Tiefe eines Pipeline-Laufs"""
+
+    def __init__(self, name):
+        self.name = name
+        self.lock = threading.Lock()
+        self.fetched = 0
+        self.uploaded = 0
+        self.succeeded = []
+        self.failures = {}
+        self.fetch_time = 0.0
+        self.upload_time = 0.0
+        self.put_wait_time = 0.0
+        self.get_wait_time = 0.0
+        self.max_queue_depth = 0
+        self.queue_depth_total = 0
+        self.queue_depth_samples = 0
+        self.wall_time = 0.0
+
+    def record_queue_depth(self, depth):
+        with self.lock:
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+            self.queue_depth_total += depth
+            self.queue_depth_samples += 1
+
+    def record_success(self, job):
+        with self.lock:
+            self.uploaded += 1
+            self.succeeded.append(job)
+
+    def record_failure(self, job, error):
+        with self.lock:
+            self.failures[job] = str(error)
+
+    def print_job_report(self, show_succeeded=True):
+        """Ergebnis pro Job; bei vielen Jobs lassen sich die erfolgreichen ausblenden"""
+        print(f"\nErgebnis '{self.name}': {len(self.succeeded)} erfolgreich, {len(self.failures)} fehlgeschlagen")
+        if show_succeeded:
+            for job in sorted(self.succeeded, key=str):
+                print(f"  OK      {job}")
+        for job, error in sorted(self.failures.items(), key=lambda failure: str(failure[0])):
+            print(f"  FEHLER  {job}: {error}")
+
+    def print_report(self):
+        avg_depth = self.queue_depth_total / self.queue_depth_samples if self.queue_depth_samples else 0
+        print(f"\nPipeline '{self.name}': {self.fetched} geladen, {self.uploaded} geschrieben, "
+              f"{len(self.failures)} fehlgeschlagen in {self.wall_time:.1f} s")
+        print(f"  Download:  {self.fetch_time:.1f} s gesamt, {self.put_wait_time:.1f} s Warten auf freie Queue")
+        print(f"  Schreiben: {self.upload_time:.1f} s gesamt, {self.get_wait_time:.1f} s Warten auf Daten")
+        print(f"  Queue-Tiefe: max. {self.max_queue_depth}, Ø {avg_depth:.1f}")
+
+def run_pipeline(name, jobs, fetch, upload, fetch_workers=1, db_workers=1, queue_size=4):
+    """Lädt Jobs mit fetch_workers Threads und schreibt sie mit db_workers Threads in die Datenbank.
+    Die begrenzte Queue dazwischen bremst die Downloads, wenn die Datenbank nicht hinterherkommt"""
+    stats = PipelineStats(name)
+    pending_jobs = queue.Queue()
+    for job in jobs:
+        pending_jobs.put(job)
+    payloads = queue.Queue(maxsize=max(queue_size, 1))
+
+    def fetch_worker():
+        while True:
+            try:
+                job = pending_jobs.get_nowait()
+            except queue.Empty:
+                return
+
+            start = time.perf_counter()
+            try:
+                payload = fetch(job)
+            except Exception as e:
+                print(f"Fehler beim Download von {job}: {e}")
+                stats.record_failure(job, e)
+                continue
+            fetched = time.perf_counter()
+
+            payloads.put((job, payload))
+            with stats.lock:
+                stats.fetched += 1
+                stats.fetch_time += fetched - start
+                stats.put_wait_time += time.perf_counter() - fetched
+            stats.record_queue_depth(payloads.qsize())
+
+    def upload_worker():
+        while True:
+            waiting = time.perf_counter()
+            item = payloads.get()
+            start = time.perf_counter()
+            with stats.lock:
+                stats.get_wait_time += start - waiting
+            if item is _DONE:
+                return
+
+            job, payload = item
+            try:
+                upload(job, payload)
+                stats.record_success(job)
+            except Exception as e:
+                print(f"Fehler beim Schreiben von {job}: {e}")
+                stats.record_failure(job, e)
+            finally:
+                with stats.lock:
+                    stats.upload_time += time.perf_counter() - start
+                stats.record_queue_depth(payloads.qsize())
+
+    begin = time.perf_counter()
+    fetch_threads = [threading.Thread(target=fetch_worker, name=f"{name}-fetch-{i}") for i in range(max(fetch_workers, 1))]
+    upload_threads = [threading.Thread(target=upload_worker, name=f"{name}-db-{i}") for i in range(max(db_workers, 1))]
+    for thread in fetch_threads + upload_threads:
+        thread.start()
+
+    for thread in fetch_threads:
+        thread.join()
+    for _ in upload_threads:
+        payloads.put(_DONE)
+    for thread in upload_threads:
+        thread.join()
+
+    stats.wall_time = time.perf_counter() - begin
+    return stats
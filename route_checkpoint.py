@@ -0,0 +1,72 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+class RouteCheckpoint:
+    """Fortschritt eines Routen-Laufs als JSON-Lines-Datei: eine Kopfzeile mit Lauf-ID,
+    danach eine Zeile pro erledigtem Routen-Aufruf. Angehängte Zeilen überstehen jeden Abbruch"""
+
+    def __init__(self, path):
+        self.path = path
+        self.run_id = None
+        self.table_name = None
+        self.completed = set()
+        self.lock = threading.Lock()
+        self.file = None
+
+    def load(self):
+        """Liest einen vorhandenen Checkpoint; liefert False, wenn keiner vorhanden ist"""
+        try:
+            checkpoint_file = open(self.path, 'r', encoding='utf-8')
+        except FileNotFoundError:
+            return False
+
+        with checkpoint_file:
+            for line in checkpoint_file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Eine beim Abbruch halb geschriebene letzte Zeile zählt nicht
+                    continue
+                if 'run_id' in entry:
+                    self.run_id = entry['run_id']
+                    self.table_name = entry.get('table')
+                elif 'done' in entry:
+                    self.completed.add(entry['done'])
+        return self.run_id is not None
+
+    def start(self, table_name):
+        """Beginnt einen neuen Lauf und überschreibt einen alten Checkpoint"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self.run_id = datetime.now().strftime('%Y%m%d-%H%M%S')
+        self.table_name = table_name
+        self.completed = set()
+        self.file = open(self.path, 'w', encoding='utf-8')
+        self.write({'run_id': self.run_id, 'table': table_name, 'started': datetime.now().isoformat(timespec='seconds')})
+
+    def resume(self):
+        """Setzt den geladenen Lauf fort, neue Einträge werden angehängt"""
+        self.file = open(self.path, 'a', encoding='utf-8')
+
+    def mark_done(self, job):
+        with self.lock:
+            self.completed.add(job)
+            self.write({'done': job})
+
+    def write(self, entry):
+        self.file.write(json.dumps(entry) + '\n')
+        self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def remove(self):
+        """Löscht den Checkpoint nach einem vollständig veröffentlichten Lauf"""
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,100 @@
+import numpy as np
+
+# Services, aus denen die Routen lokal berechnet werden
+SOURCE_SERVICES = ('commodities_prices_all', 'terminals')
+# Felder, die die Berechnung aus den Quell-Services benötigt
+SOURCE_FIELDS = {
+    'commodities_prices_all': ('id_commodity', 'commodity_name', 'id_terminal', 'terminal_name',
+                               'price_buy', 'price_sell', 'scu_buy', 'scu_sell'),
+    'terminals': ('id', 'star_system_name')
+}
+
+def group_prices_by_commodity(price_rows):
+    """Teilt die Preiszeilen in einem Durchlauf nach Commodity auf"""
+    groups = {}
+    for row in price_rows:
+        commodity_id = row.get('id_commodity')
+        if commodity_id is not None:
+            groups.setdefault(commodity_id, []).append(row)
+    return groups
+
+def compute_routes(price_rows, investments, top_routes=10, terminals=None):
+    """Berechnet die profitabelsten Terminal-Paare aller Commodities für jede Investitionsstufe"""
+    terminal_lookup = {terminal['id']: terminal for terminal in terminals or [] if 'id' in terminal}
+
+    routes = []
+    for commodity_id, rows in group_prices_by_commodity(price_rows).items():
+        routes.extend(compute_commodity_routes(commodity_id, rows, investments, top_routes, terminal_lookup))
+    return routes
+
+def compute_commodity_routes(commodity_id, rows, investments, top_routes, terminal_lookup):
+    """Bildet die Kauf-/Verkaufsmatrix einer Commodity einmal und liefert je Investition die besten top_routes Routen"""
+    price_buy = column(rows, 'price_buy', 0)
+    price_sell = column(rows, 'price_sell', 0)
+    # Fehlender Bestand begrenzt die Menge nicht, ein Bestand von 0 schließt das Terminal aus
+    scu_buy = column(rows, 'scu_buy', np.inf)
+    scu_sell = column(rows, 'scu_sell', np.inf)
+    terminal_ids = column(rows, 'id_terminal', -1)
+
+    origins = np.flatnonzero(price_buy > 0)
+    destinations = np.flatnonzero(price_sell > 0)
+    if not origins.size or not destinations.size:
+        return []
+
+    buy = price_buy[origins]
+    sell = price_sell[destinations]
+    margin = sell[np.newaxis, :] - buy[:, np.newaxis]
+
+    stock = scu_buy[origins]
+    demand = scu_sell[destinations][np.newaxis, :]
+
+    # Keine Routen innerhalb desselben Terminals, keine Verlustgeschäfte und keine Terminals ohne Bestand
+    # bzw. Nachfrage, unabhängig von der Investition
+    invalid_pairs = ((terminal_ids[origins][:, np.newaxis] == terminal_ids[destinations][np.newaxis, :]) | (margin <= 0)
+                     | (stock[:, np.newaxis] <= 0) | (demand <= 0))
+
+    commodity_name = next((row['commodity_name'] for row in rows if row.get('commodity_name')), None)
+
+    routes = []
+    for investment in investments:
+        # Menge pro Paar: Budget, Bestand am Start und Nachfrage am Ziel
+        affordable = np.minimum(np.floor(investment / buy), stock)
+        scu = np.minimum(affordable[:, np.newaxis], demand)
+        profit = margin * scu
+        profit[invalid_pairs | (scu <= 0)] = -np.inf
+
+        count = min(top_routes, int(np.count_nonzero(profit > 0)))
+        if count == 0:
+            continue
+
+        best = np.argpartition(profit, -count, axis=None)[-count:]
+        best = best[np.argsort(profit.ravel()[best])[::-1]]
+        origin_indexes, destination_indexes = np.unravel_index(best, profit.shape)
+
+        for i, j in zip(origin_indexes, destination_indexes):
+            origin = rows[origins[i]]
+            destination = rows[destinations[j]]
+            routes.append({
+                'id_commodity': commodity_id,
+                'commodity_name': commodity_name,
+                'id_terminal_origin': origin.get('id_terminal'),
+                'terminal_origin_name': origin.get('terminal_name'),
+                'origin_star_system_name': terminal_lookup.get(origin.get('id_terminal'), {}).get('star_system_name'),
+                'id_terminal_destination': destination.get('id_terminal'),
+                'terminal_destination_name': destination.get('terminal_name'),
+                'destination_star_system_name': terminal_lookup.get(destination.get('id_terminal'), {}).get('star_system_name'),
+                'price_origin': float(buy[i]),
+                'price_destination': float(sell[j]),
+                'price_margin': round(float(margin[i, j]), 2),
+                'price_roi': round(float(margin[i, j] / buy[i] * 100), 2),
+                'scu_origin': origin.get('scu_buy'),
+                'scu_destination': destination.get('scu_sell'),
+                'scu_reachable': int(scu[i, j]),
+                'investment': investment,
+                'profit': round(float(profit[i, j]), 2)
+            })
+    return routes
+
+def column(rows, key, missing):
+    """Liest ein numerisches Feld aller Zeilen als float-Array, fehlende Werte (None) werden zu missing"""
+    return np.array([missing if row.get(key) is None else row.get(key) for row in rows], dtype=float)
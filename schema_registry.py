@@ -0,0 +1,197 @@
+import threading
+import mysql.connector as mysql
+
+class SchemaRegistry:
+    """Spalten aller Tabellen einer Datenbank, einmal aus information_schema geladen und im Prozess gepflegt"""
+
+    def __init__(self, database):
+        self.database = database
+        self.tables = None
+        self.lock = threading.RLock()
+
+    def full_name(self, table_name):
+        return f"{self.database}.{table_name}"
+
+    def ensure_loaded(self, mycursor):
+        """Lädt beim ersten Zugriff das Schema der ganzen Datenbank mit einer Abfrage"""
+        with self.lock:
+            if self.tables is None:
+                self.tables = self.query_columns(mycursor)
+
+    def query_columns(self, mycursor, table_name=None):
+        query = (
+            "SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE FROM information_schema.COLUMNS "
+            "WHERE TABLE_SCHEMA = %s"
+        )
+        params = [self.database]
+        if table_name is not None:
+            query += " AND TABLE_NAME = %s"
+            params.append(table_name)
+        mycursor.execute(query + " ORDER BY TABLE_NAME, ORDINAL_POSITION", params)
+
+        tables = {}
+        for table, column, column_type in mycursor.fetchall():
+            tables.setdefault(decode(table), {})[decode(column)] = decode(column_type)
+        return tables
+
+    def columns(self, mycursor, table_name):
+        """Spalten einer Tabelle mit ihrem Typ"""
+        self.ensure_loaded(mycursor)
+        with self.lock:
+            return dict(self.tables.get(table_name, {}))
+
+    def ensure_table(self, mycursor, table_name, definition="(id INT AUTO_INCREMENT PRIMARY KEY)"):
+        """Legt die Tabelle (standardmäßig mit id als Primärschlüssel) an, wenn sie noch unbekannt ist"""
+        self.ensure_loaded(mycursor)
+        with self.lock:
+            if table_name in self.tables:
+                return
+            mycursor.execute(f"CREATE TABLE IF NOT EXISTS {self.full_name(table_name)} {definition}")
+            # Die Tabelle könnte zwischenzeitlich von außen angelegt worden sein
+            self.tables[table_name] = self.query_columns(mycursor, table_name).get(table_name, {})
+
+    def add_columns(self, mycursor, table_name, column_types, service_name=None):
+        """Ergänzt alle fehlenden Spalten mit einem einzigen ALTER TABLE"""
+        self.update_columns(mycursor, table_name, column_types,
+                            lambda column, current_type: column_types[column] if current_type is None else None, service_name)
+
+    def update_columns(self, mycursor, table_name, column_names, resolve, service_name=None):
+        """Legt fehlende Spalten an und ändert vorhandene, für die resolve(spalte, aktueller_typ) einen neuen Typ liefert.
+        Alle Änderungen laufen in einem einzigen ALTER TABLE; resolve wird unter der Sperre aufgerufen,
+        damit parallele Schreiber keinen veralteten Typ zurückschreiben"""
+        service_name = service_name or table_name
+        self.ensure_loaded(mycursor)
+        with self.lock:
+            known = self.tables.setdefault(table_name, {})
+            changes = {}
+            for column in column_names:
+                current_type = known.get(column)
+                new_type = resolve(column, current_type)
+                if new_type is not None and (current_type is None or new_type.lower() != current_type.lower()):
+                    changes[column] = (current_type, new_type)
+            if not changes:
+                return
+
+            try:
+                mycursor.execute(f"ALTER TABLE {self.full_name(table_name)} {', '.join(column_clause(column, change) for column, change in changes.items())}")
+                for column, change in changes.items():
+                    known[column] = change[1]
+                    print_column_change(column, change, service_name)
+                return
+            except mysql.Error as e:
+                print(f"Fehler beim gemeinsamen Ändern der Spalten, versuche sie einzeln: {e}")
+
+            # Einzeln nachholen, damit eine fehlerhafte Spalte die übrigen nicht blockiert
+            for column, change in changes.items():
+                try:
+                    mycursor.execute(f"ALTER TABLE {self.full_name(table_name)} {column_clause(column, change)}")
+                    known[column] = change[1]
+                    print_column_change(column, change, service_name)
+                except mysql.Error as e:
+                    print(f"Fehler beim Ändern der Spalte '{column}': {e}")
+
+    def existing_indexes(self, mycursor, table_name):
+        """Spaltenfolgen aller Indizes einer Tabelle"""
+        mycursor.execute(
+            "SELECT INDEX_NAME, COLUMN_NAME FROM information_schema.STATISTICS "
+            "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s ORDER BY INDEX_NAME, SEQ_IN_INDEX",
+            (self.database, table_name)
+        )
+        indexes = {}
+        for index_name, column in mycursor.fetchall():
+            indexes.setdefault(decode(index_name), []).append(decode(column))
+        return [tuple(columns) for columns in indexes.values()]
+
+    def add_indexes(self, mycursor, table_name, indexes):
+        """Legt fehlende Indizes idx_<spalten> mit einem einzigen ALTER TABLE an.
+        Ein Index ist eine Spalte oder ein Tupel von Spalten, vorhandene Indizes mit gleichem Anfang genügen"""
+        known = self.columns(mycursor, table_name)
+        existing = self.existing_indexes(mycursor, table_name)
+
+        missing = []
+        for index in indexes:
+            index_columns = (index,) if isinstance(index, str) else tuple(index)
+            if not all(column in known for column in index_columns):
+                continue
+            # JSON-Spalten lassen sich nicht direkt indizieren
+            if any(known[column].lower() == 'json' for column in index_columns):
+                continue
+            if any(columns[:len(index_columns)] == index_columns for columns in existing + missing):
+                continue
+            missing.append(index_columns)
+        if not missing:
+            return
+
+        add_clauses = ', '.join(
+            f"ADD INDEX idx_{'_'.join(columns)} ({', '.join(index_part(column, known[column]) for column in columns)})"
+            for columns in missing
+        )
+        mycursor.execute(f"ALTER TABLE {self.full_name(table_name)} {add_clauses}")
+        print(f"Indizes {', '.join('(' + ', '.join(columns) + ')' for columns in missing)} in Tabelle '{table_name}' angelegt")
+
+    def drop_secondary_indexes(self, mycursor, table_name):
+        """Entfernt alle nicht eindeutigen Indizes, damit große Ladevorgänge sie nicht pflegen müssen"""
+        mycursor.execute(
+            "SELECT DISTINCT INDEX_NAME FROM information_schema.STATISTICS "
+            "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND NON_UNIQUE = 1",
+            (self.database, table_name)
+        )
+        index_names = [decode(index_name) for (index_name,) in mycursor.fetchall()]
+        if index_names:
+            drop_clauses = ', '.join(f"DROP INDEX {index_name}" for index_name in index_names)
+            mycursor.execute(f"ALTER TABLE {self.full_name(table_name)} {drop_clauses}")
+
+    def copy_table(self, mycursor, source_table_name, target_table_name):
+        """CREATE TABLE ... LIKE mit Übernahme der Spalten in die Registry"""
+        self.ensure_loaded(mycursor)
+        mycursor.execute(f"CREATE TABLE {self.full_name(target_table_name)} LIKE {self.full_name(source_table_name)}")
+        with self.lock:
+            self.tables[target_table_name] = dict(self.tables.get(source_table_name, {}))
+
+    def drop_table(self, mycursor, table_name):
+        mycursor.execute(f"DROP TABLE IF EXISTS {self.full_name(table_name)}")
+        with self.lock:
+            if self.tables is not None:
+                self.tables.pop(table_name, None)
+
+    def rename_tables(self, mycursor, renames):
+        """Benennt mehrere Tabellen in einem einzigen, atomaren RENAME TABLE um"""
+        self.ensure_loaded(mycursor)
+        clauses = ', '.join(f"{self.full_name(old)} TO {self.full_name(new)}" for old, new in renames)
+        mycursor.execute(f"RENAME TABLE {clauses}")
+        with self.lock:
+            for old, new in renames:
+                self.tables[new] = self.tables.pop(old, {})
+
+def column_clause(column, change):
+    current_type, new_type = change
+    return f"{'ADD' if current_type is None else 'MODIFY'} COLUMN {column} {new_type}"
+
+def print_column_change(column, change, service_name):
+    current_type, new_type = change
+    if current_type is None:
+        print(f"Spalte '{column}' ({new_type}) zur Tabelle '{service_name}' hinzugefügt")
+    else:
+        print(f"Spalte '{column}' der Tabelle '{service_name}' von {current_type} auf {new_type} geändert")
+
+def index_part(column, column_type):
+    # TEXT- und BLOB-Spalten brauchen eine Präfixlänge
+    if column_type.lower().endswith(('text', 'blob')):
+        return f"{column}(191)"
+    return column
+
+def decode(value):
+    # Je nach Connector-Version kommen Texte aus information_schema als bytes
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode('utf-8')
+    return value
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+def get_schema_registry(database):
+    """Liefert die Registry einer Datenbank, die für den ganzen Lauf gültig bleibt"""
+    with _registries_lock:
+        if database not in _registries:
+            _registries[database] = SchemaRegistry(database)
+        return _registries[database]
@@ -0,0 +1,179 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+
+# zstd ist optional, ohne das Paket wird mit gzip archiviert
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSION_SUFFIXES = {'gzip': '.json.gz', 'zstd': '.json.zst'}
+OBJECTS_DIR = 'objects'
+RUNS_DIR = 'runs'
+# Block-Größe beim Nachlesen gestreamter Antworten
+READ_CHUNK_SIZE = 1 << 16
+
+def is_archive_enabled(config):
+    return config.getboolean('archive', 'enabled', fallback=False)
+
+def get_compression(config):
+    """Kompression der Snapshots ([archive] compression), zstd fällt ohne zstandard auf gzip zurück"""
+    compression = config.get('archive', 'compression', fallback='gzip').strip().lower()
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Unbekannte Kompression '{compression}', erlaubt sind gzip und zstd")
+    if compression == 'zstd' and zstandard is None:
+        print("zstandard nicht installiert, archiviere mit gzip")
+        return 'gzip'
+    return compression
+
+def open_object(path):
+    """Öffnet einen Snapshot als dekomprimierenden Datenstrom, das Format ergibt sich aus der Endung"""
+    raw_file = open(path, 'rb')
+    if path.endswith(COMPRESSION_SUFFIXES['zstd']):
+        if zstandard is None:
+            raw_file.close()
+            raise RuntimeError(f"'{path}' ist zstd-komprimiert, zum Lesen wird zstandard benötigt")
+        return zstandard.ZstdDecompressor().stream_reader(raw_file, closefd=True)
+    return gzip.GzipFile(fileobj=raw_file, mode='rb')
+
+class SnapshotWriter:
+    """Schreibt eine Antwort komprimiert in eine temporäre Datei und hasht sie dabei.
+    Erst commit() legt sie unter ihrem Inhalts-Hash ab und trägt sie ins Manifest ein"""
+
+    def __init__(self, archive, service):
+        self.archive = archive
+        self.service = service
+        self.endpoint = service.split('?', 1)[0]
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+        directory = os.path.join(archive.path, OBJECTS_DIR, self.endpoint)
+        os.makedirs(directory, exist_ok=True)
+        self.temp_path = os.path.join(directory, f"{os.getpid()}.{threading.get_ident()}.{id(self)}.tmp")
+        self.file = open(self.temp_path, 'wb')
+        if archive.compression == 'zstd':
+            self.compressor = zstandard.ZstdCompressor().stream_writer(self.file, closefd=False)
+        else:
+            # mtime=0 macht gleiche Antworten auch byteweise gleich
+            self.compressor = gzip.GzipFile(fileobj=self.file, mode='wb', mtime=0)
+
+    def write(self, data):
+        self.digest.update(data)
+        self.size += len(data)
+        self.compressor.write(data)
+
+    def commit(self):
+        self.compressor.close()
+        self.file.close()
+
+        sha256 = self.digest.hexdigest()
+        relative_path = os.path.join(OBJECTS_DIR, self.endpoint, sha256 + COMPRESSION_SUFFIXES[self.archive.compression])
+        path = os.path.join(self.archive.path, relative_path)
+        # Unveränderte Antworten liegen schon unter demselben Hash
+        new_object = not os.path.exists(path)
+        if new_object:
+            os.replace(self.temp_path, path)
+        else:
+            os.remove(self.temp_path)
+
+        self.archive.record(self.service, relative_path, sha256, self.size, new_object)
+
+    def discard(self):
+        """Verwirft eine unvollständig gelesene Antwort"""
+        self.compressor.close()
+        self.file.close()
+        try:
+            os.remove(self.temp_path)
+        except FileNotFoundError:
+            pass
+
+class TeeReader:
+    """Reicht gelesene Bytes eines Datenstroms zusätzlich an einen SnapshotWriter weiter"""
+
+    def __init__(self, source, writer):
+        self.source = source
+        self.writer = writer
+
+    def read(self, size=-1):
+        data = self.source.read(size)
+        if data:
+            self.writer.write(data)
+        return data
+
+    def drain(self):
+        """Liest den Rest des Datenstroms, damit der Snapshot vollständig ist"""
+        while self.read(READ_CHUNK_SIZE):
+            pass
+
+class SnapshotArchive:
+    """Inhaltsadressiertes Archiv roher API-Antworten mit einem JSON-Lines-Manifest pro Lauf.
+    Gleiche Antworten werden über ihren SHA-256 nur einmal gespeichert"""
+
+    def __init__(self, config, run_id=None):
+        self.path = config.get('archive', 'path', fallback='Archive')
+        self.compression = get_compression(config)
+        self.run_id = run_id or datetime.now().strftime('%Y%m%d-%H%M%S')
+        self.lock = threading.Lock()
+        self.manifest = None
+        self.stored = 0
+        self.new_objects = 0
+
+    def manifest_path(self, run_id=None):
+        return os.path.join(self.path, RUNS_DIR, f"{run_id or self.run_id}.jsonl")
+
+    def writer(self, service):
+        return SnapshotWriter(self, service)
+
+    def store(self, service, content):
+        """Archiviert eine vollständig geladene Antwort"""
+        writer = self.writer(service)
+        writer.write(content)
+        writer.commit()
+
+    def record(self, service, relative_path, sha256, size, new_object):
+        with self.lock:
+            if self.manifest is None:
+                os.makedirs(os.path.join(self.path, RUNS_DIR), exist_ok=True)
+                self.manifest = open(self.manifest_path(), 'w', encoding='utf-8')
+                self.write_manifest({'run_id': self.run_id, 'started': datetime.now().isoformat(timespec='seconds')})
+            self.write_manifest({'service': service, 'object': relative_path, 'sha256': sha256, 'bytes': size})
+            self.stored += 1
+            self.new_objects += new_object
+
+    def write_manifest(self, entry):
+        self.manifest.write(json.dumps(entry) + '\n')
+        self.manifest.flush()
+
+    def load_manifest(self, run_id):
+        """Service -> Manifest-Eintrag eines archivierten Laufs"""
+        entries = {}
+        try:
+            manifest_file = open(self.manifest_path(run_id), 'r', encoding='utf-8')
+        except FileNotFoundError:
+            raise ValueError(f"Kein archivierter Lauf '{run_id}' in '{self.path}'") from None
+
+        with manifest_file:
+            for line in manifest_file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if 'service' in entry:
+                    entries[entry['service']] = entry
+        return entries
+
+    def open(self, entry):
+        return open_object(os.path.join(self.path, entry['object']))
+
+    def close(self):
+        with self.lock:
+            if self.manifest is None:
+                return
+            self.manifest.close()
+            self.manifest = None
+        print(f"\n{self.stored} Antworten als Lauf {self.run_id} archiviert ({self.new_objects} neue Snapshots), "
+              f"erneut einspielen mit: python main.py --replay {self.run_id}")
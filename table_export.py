@@ -0,0 +1,161 @@
+import bz2
+import csv
+import gzip
+import json
+import lzma
+import os
+from decimal import Decimal
+from mysql.connector.constants import FieldType
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    # Parquet-Export ist optional, CSV und JSONL kommen ohne pyarrow aus
+    pa = None
+    pq = None
+
+EXPORT_FORMATS = ('csv', 'jsonl', 'parquet')
+# Kompression für CSV/JSONL über die Standardbibliothek
+TEXT_COMPRESSION = {'gzip': gzip.open, 'bz2': bz2.open, 'xz': lzma.open}
+PARQUET_COMPRESSION = ('snappy', 'gzip', 'zstd', 'brotli', 'lz4')
+PART_SUFFIX = '.part'
+
+INTEGER_FIELD_TYPES = {FieldType.TINY, FieldType.SHORT, FieldType.INT24, FieldType.LONG,
+                       FieldType.LONGLONG, FieldType.YEAR, FieldType.BIT}
+FLOAT_FIELD_TYPES = {FieldType.FLOAT, FieldType.DOUBLE, FieldType.DECIMAL, FieldType.NEWDECIMAL}
+DATETIME_FIELD_TYPES = {FieldType.DATETIME, FieldType.TIMESTAMP}
+DATE_FIELD_TYPES = {FieldType.DATE, FieldType.NEWDATE}
+
+def check_compression(export_format, compress):
+    """Prüft, ob die Kompression zum Format passt"""
+    if compress in (None, 'none'):
+        return
+    allowed = PARQUET_COMPRESSION if export_format == 'parquet' else tuple(TEXT_COMPRESSION)
+    if compress not in allowed:
+        raise ValueError(f"Kompression '{compress}' wird für {export_format} nicht unterstützt, erlaubt sind: {', '.join(allowed)}")
+
+def check_export_args(export_format, compress):
+    """Prüft Format und Kompression, bevor eine Abfrage gestartet wird"""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unbekanntes Exportformat '{export_format}', erlaubt sind: {', '.join(EXPORT_FORMATS)}")
+    if export_format == 'parquet' and pa is None:
+        raise RuntimeError("Parquet-Export benötigt pyarrow (pip install pyarrow)")
+    check_compression(export_format, compress)
+
+def open_text_output(path, compress):
+    if compress in (None, 'none'):
+        return open(path, 'w', encoding='utf-8', newline='')
+    return TEXT_COMPRESSION[compress](path, 'wt', encoding='utf-8', newline='')
+
+class CsvExportWriter:
+    def __init__(self, path, columns, compress):
+        self.file = open_text_output(path, compress)
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+def json_default(value):
+    """Decimal und Datumswerte als Text, Bytes als UTF-8"""
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode('utf-8', errors='replace')
+    return str(value)
+
+class JsonlExportWriter:
+    def __init__(self, path, columns, compress):
+        self.file = open_text_output(path, compress)
+        self.columns = columns
+
+    def write(self, rows):
+        columns = self.columns
+        self.file.writelines(json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=json_default) + '\n' for row in rows)
+
+    def close(self):
+        self.file.close()
+
+def arrow_type(type_code):
+    """Parquet-Typ einer Ergebnisspalte anhand des MySQL-Feldtyps aus cursor.description"""
+    if type_code in INTEGER_FIELD_TYPES:
+        return pa.int64()
+    if type_code in FLOAT_FIELD_TYPES:
+        return pa.float64()
+    if type_code in DATETIME_FIELD_TYPES:
+        return pa.timestamp('us')
+    if type_code in DATE_FIELD_TYPES:
+        return pa.date32()
+    return pa.string()
+
+def arrow_values(values, value_type):
+    """Passt die Python-Werte einer Spalte an den Parquet-Typ an"""
+    if pa.types.is_floating(value_type):
+        return [float(value) if isinstance(value, Decimal) else value for value in values]
+    if pa.types.is_string(value_type):
+        return [
+            value if value is None or isinstance(value, str)
+            else value.decode('utf-8', errors='replace') if isinstance(value, (bytes, bytearray))
+            else str(value)
+            for value in values
+        ]
+    return values
+
+class ParquetExportWriter:
+    """Schreibt jeden Chunk als eigene Row Group; das Schema kommt aus den MySQL-Feldtypen,
+    damit ein Chunk mit nur NULL-Werten den Typ einer Spalte nicht festlegt"""
+
+    def __init__(self, path, description, compress):
+        self.schema = pa.schema([(column[0], arrow_type(column[1])) for column in description])
+        self.writer = pq.ParquetWriter(path, self.schema, compression='none' if compress in (None, 'none') else compress)
+
+    def write(self, rows):
+        arrays = [
+            pa.array(arrow_values(values, field.type), type=field.type)
+            for values, field in zip(zip(*rows), self.schema)
+        ]
+        self.writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+def create_writer(path, description, export_format, compress):
+    columns = [column[0] for column in description]
+    if export_format == 'csv':
+        return CsvExportWriter(path, columns, compress)
+    if export_format == 'jsonl':
+        return JsonlExportWriter(path, columns, compress)
+    if export_format == 'parquet':
+        if pa is None:
+            raise RuntimeError("Parquet-Export benötigt pyarrow (pip install pyarrow)")
+        return ParquetExportWriter(path, description, compress)
+    raise ValueError(f"Unbekanntes Exportformat '{export_format}', erlaubt sind: {', '.join(EXPORT_FORMATS)}")
+
+def export_rows(cursor, path, export_format, chunk_size, compress=None):
+    """Schreibt das Ergebnis eines ungepufferten Cursors chunkweise in eine Datei; im Speicher liegt
+    höchstens ein Chunk. Bis zum Abschluss wird in <path>.part geschrieben, ein Abbruch hinterlässt keine halbe Datei"""
+    check_compression(export_format, compress)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    part_path = path + PART_SUFFIX
+    writer = create_writer(part_path, cursor.description, export_format, compress)
+    row_count = 0
+    try:
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            writer.write(rows)
+            row_count += len(rows)
+        writer.close()
+    except BaseException:
+        writer.close()
+        os.remove(part_path)
+        raise
+
+    os.replace(part_path, path)
+    return row_count
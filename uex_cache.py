@@ -0,0 +1,81 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+class ResponseCache:
+    """On-Disk-Cache für UEX-Antworten mit ETag/Last-Modified und TTL pro Service"""
+
+    def __init__(self, config):
+        self.path = config.get('cache', 'path', fallback='Cache')
+        self.services = {
+            service.strip() for service in config.get('cache', 'services', fallback='').split(',') if service.strip()
+        }
+        self.default_ttl = config.getint('cache', 'default_ttl', fallback=0)
+        self.config = config
+
+    def enabled_for(self, service):
+        return service.split('?', 1)[0] in self.services
+
+    def ttl(self, service):
+        """TTL in Sekunden, überschreibbar per ttl_<service> in der [cache]-Sektion"""
+        endpoint = service.split('?', 1)[0]
+        return self.config.getint('cache', f"ttl_{endpoint}", fallback=self.default_ttl)
+
+    def entry_path(self, service):
+        # Schlüssel aus Endpunkt und Query, damit auch parametrisierte Aufrufe getrennt liegen
+        endpoint = service.split('?', 1)[0]
+        digest = hashlib.sha256(service.encode('utf-8')).hexdigest()
+        return os.path.join(self.path, endpoint, f"{digest}.json")
+
+    def load(self, service):
+        """Liefert den gespeicherten Eintrag oder None"""
+        try:
+            with open(self.entry_path(service), 'r', encoding='utf-8') as cache_file:
+                return json.load(cache_file)
+        except (OSError, ValueError):
+            return None
+
+    def is_fresh(self, service, entry):
+        ttl = self.ttl(service)
+        return ttl > 0 and time.time() - entry.get('fetched_at', 0) < ttl
+
+    def conditional_headers(self, entry):
+        """Header für einen bedingten Request auf Basis des gespeicherten Eintrags"""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, service, payload, etag=None, last_modified=None):
+        self.write(service, {
+            'service': service,
+            'etag': etag,
+            'last_modified': last_modified,
+            'fetched_at': time.time(),
+            'payload': payload
+        })
+
+    def touch(self, service, entry):
+        """Setzt die TTL nach einer 304-Antwort zurück"""
+        entry['fetched_at'] = time.time()
+        self.write(service, entry)
+
+    def write(self, service, entry):
+        path = self.entry_path(service)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Erst in eine temporäre Datei schreiben, damit parallele Leser nie halbe Einträge sehen
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as cache_file:
+            json.dump(entry, cache_file)
+        os.replace(temp_path, path)
+
+    def invalidate(self, service):
+        try:
+            os.remove(self.entry_path(service))
+        except FileNotFoundError:
+            pass
@@ -1,101 +1,398 @@
 import mysql.connector as mysql
+import hashlib
 import json
+import os
+import tempfile
+from contextlib import contextmanager
 from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from db_pool import ConnectionPool
+from schema_registry import get_schema_registry
+from column_profile import TableProfile, parse_column_type, resolve_column_type
+import history_tables as history
 
-def upload_to_mysql(uex_service_data, mySqlConfig, table_name):
-    mydb = mysql.connect(
+STAGING_SUFFIX = '_staging'
+OLD_SUFFIX = '_old'
+ROW_HASH_COLUMN = 'row_hash'
+# Routen werden meist nach Investitionsstufe gefiltert
+ROUTE_INDEX_COLUMNS = ('investment',)
+# Ein Routen-Aufruf liefert die Routen genau einer Commodity und Investitionsstufe
+ROUTE_JOB_KEY = ('id_commodity', 'investment')
+
+def connect_to_mysql(mySqlConfig):
+    """Öffnet eine Verbindung; LOAD DATA LOCAL wird nur bei konfigurierten Bulk-Load-Services
+    und nur aus dem Bulk-Load-Verzeichnis erlaubt"""
+    options = {}
+    if get_bulk_load_services(mySqlConfig):
+        options['allow_local_infile_in_path'] = get_bulk_load_dir(mySqlConfig)
+    return mysql.connect(
         host=mySqlConfig['MYSQL_SERVER']['HOST'],
         user=mySqlConfig['MYSQL_USER']['USERNAME'],
-        password=mySqlConfig['MYSQL_USER']['PASSWORD']
+        password=mySqlConfig['MYSQL_USER']['PASSWORD'],
+        **options
     )
 
+def get_bulk_load_dir(mySqlConfig):
+    # mysql-connector lehnt symbolische Links ab (z. B. /tmp unter macOS)
+    return os.path.realpath(mySqlConfig.get('UPLOAD', 'BULK_LOAD_DIR', fallback=tempfile.gettempdir()))
+
+@contextmanager
+def open_connection(mySqlConfig, pool=None):
+    """Liefert eine Verbindung aus dem Pool oder eine einmalige, die danach geschlossen wird"""
+    if pool is not None:
+        with pool.connection() as mydb:
+            yield mydb
+        return
+
+    mydb = connect_to_mysql(mySqlConfig)
+    try:
+        yield mydb
+    finally:
+        mydb.close()
+
+def upload_to_mysql(uex_service_data, mySqlConfig, table_name, pool=None):
+    if uex_service_data is None:
+        print(f"Keine Daten für '{table_name}' erhalten, Upload übersprungen")
+        return
+
     # Extrahiere die Daten aus dem 'data' Feld
     data = uex_service_data.get('data', [])
+
+    with open_connection(mySqlConfig, pool) as mydb:
+        # Historien-Services hängen zusätzlich einen Snapshot an ihre Zeitreihe an
+        if isinstance(data, list) and history.is_history_service(mySqlConfig, table_name):
+            append_history(data, mydb, mySqlConfig, table_name)
+
+        # Inkrementelle Services schreiben nur Änderungen direkt in die Live-Tabelle
+        if isinstance(data, list) and is_incremental_service(mySqlConfig, table_name):
+            upsert_data_list(data, mydb, mySqlConfig, table_name)
+            return
+        
+        # Lade in die Staging-Tabelle, die Live-Tabelle bleibt bis zum Tausch unberührt
+        staging_table_name = begin_staging(mydb, mySqlConfig, table_name)
+        
+        # Falls data eine Liste ist, verarbeite jeden Eintrag; die leere Staging-Tabelle darf Typen verkleinern
+        if isinstance(data, list):
+            process_data_list(data, mydb, mySqlConfig, staging_table_name, False, allow_shrink=True)
+        else:
+            # Falls data ein einzelnes Objekt ist
+            process_single_data(data, mydb, mySqlConfig, staging_table_name, False, allow_shrink=True)
+        
+        publish_staging(mydb, mySqlConfig, table_name)
+
+def upload_stream(batches, mySqlConfig, table_name, pool=None):
+    """Lädt einen gestreamten Service Batch für Batch in die Staging-Tabelle.
+    Das Spaltenprofil wird laufend fortgeschrieben, der Speicherbedarf hängt nur von der Batchgröße ab"""
+    # Änderungserkennung und Historie brauchen den vollständigen Datensatz
+    if is_incremental_service(mySqlConfig, table_name) or history.is_history_service(mySqlConfig, table_name):
+        print(f"'{table_name}' ist inkrementell oder mit Historie konfiguriert, Daten werden vollständig geladen")
+        upload_to_mysql({'data': [item for batch in batches for item in batch]}, mySqlConfig, table_name, pool)
+        return
     
-    # Falls data eine Liste ist, verarbeite jeden Eintrag
-    if isinstance(data, list):
-        process_data_list(data, mydb, mySqlConfig, table_name, True)
-    else:
-        # Falls data ein einzelnes Objekt ist
-        process_single_data(data, mydb, mySqlConfig, table_name, True)
+    database = mySqlConfig['MYSQL_SERVER']['DATABASE']
+    registry = get_schema_registry(database)
+    profile = TableProfile()
+    inserted_count = 0
     
-    mydb.close()
+    with open_connection(mySqlConfig, pool) as mydb:
+        staging_table_name = begin_staging(mydb, mySqlConfig, table_name)
+        
+        mycursor = mydb.cursor()
+        # Nur vor dem ersten Batch ist die Staging-Tabelle leer und darf Typen verkleinern
+        allow_shrink = True
+        for batch in batches:
+            columns, rows = profile.profile_rows(batch)
+            ensure_table_columns(mycursor, registry, staging_table_name, batch, profile, allow_shrink)
+            allow_shrink = False
+            inserted_count += load_rows(mycursor, mySqlConfig, f"{database}.{staging_table_name}", staging_table_name, columns, rows)
+            mydb.commit()
+        mycursor.close()
+        
+        publish_staging(mydb, mySqlConfig, table_name)
+    
+    print(f"{inserted_count} Datensätze gestreamt in Tabelle '{table_name}' geladen")
+    print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
-def upload_route_data(uex_route_data, mySqlConfig, table_name, firstRun):
-    mydb = mysql.connect(
-        host=mySqlConfig['MYSQL_SERVER']['HOST'],
-        user=mySqlConfig['MYSQL_USER']['USERNAME'],
-        password=mySqlConfig['MYSQL_USER']['PASSWORD']
-    )
+def upload_route_data(uex_route_data, mySqlConfig, table_name, firstRun, pool=None):
+    if uex_route_data is None:
+        print(f"Keine Routendaten für '{table_name}' erhalten, Upload übersprungen")
+        return
 
     data = uex_route_data.get('data', [])
 
-    if firstRun:
-        fullTableName = f"{mySqlConfig['MYSQL_SERVER']['DATABASE']}.{table_name}"
-        clear_table_data(mydb, fullTableName)
+    with open_connection(mySqlConfig, pool) as mydb:
+        # Der erste Batch legt eine frische Staging-Tabelle an, alle weiteren hängen dort an
+        if firstRun:
+            staging_table_name = begin_staging(mydb, mySqlConfig, table_name)
+        else:
+            staging_table_name = f"{table_name}{STAGING_SUFFIX}"
 
-    if isinstance(data, list):
-        process_data_list(data, mydb, mySqlConfig, table_name, False)
-    else:
-        process_single_data(data, mydb, mySqlConfig, table_name, False)
+        if isinstance(data, list):
+            process_data_list(data, mydb, mySqlConfig, staging_table_name, False, allow_shrink=firstRun)
+        else:
+            process_single_data(data, mydb, mySqlConfig, staging_table_name, False, allow_shrink=firstRun)
+
+def begin_route_upload(mySqlConfig, table_name, pool=None):
+    """Legt vor dem ersten Routen-Batch eine frische Staging-Tabelle an"""
+    with open_connection(mySqlConfig, pool) as mydb:
+        begin_staging(mydb, mySqlConfig, table_name)
+
+def resume_route_upload(mySqlConfig, table_name, pending_keys, pool=None):
+    """Setzt einen abgebrochenen Routen-Upload in der vorhandenen Staging-Tabelle fort.
+    Zeilen noch offener Aufrufe werden entfernt, da sie vor dem Abbruch geschrieben, aber nicht
+    mehr als erledigt vermerkt worden sein können. Liefert False, wenn es keine Staging-Tabelle mehr gibt"""
+    database = mySqlConfig['MYSQL_SERVER']['DATABASE']
+    registry = get_schema_registry(database)
+    staging_table_name = f"{table_name}{STAGING_SUFFIX}"
+    
+    with open_connection(mySqlConfig, pool) as mydb:
+        mycursor = mydb.cursor()
+        columns = registry.columns(mycursor, staging_table_name)
+        if not columns:
+            mycursor.close()
+            return False
+        
+        if pending_keys and all(column in columns for column in ROUTE_JOB_KEY):
+            batch_size = mySqlConfig.getint('UPLOAD', 'BATCH_SIZE', fallback=1000)
+            deleted_count = delete_rows_by_key(mycursor, f"{database}.{staging_table_name}", ROUTE_JOB_KEY, pending_keys, batch_size)
+            mydb.commit()
+            if deleted_count:
+                print(f"{deleted_count} Routen offener Aufrufe aus '{staging_table_name}' entfernt")
+        mycursor.close()
+    return True
+
+def publish_route_data(mySqlConfig, table_name, pool=None):
+    """Veröffentlicht die gesammelten Routen-Batches nach dem letzten Upload"""
+    with open_connection(mySqlConfig, pool) as mydb:
+        publish_staging(mydb, mySqlConfig, table_name, ROUTE_INDEX_COLUMNS)
+
+def create_connection_pool(mySqlConfig, min_size=1):
+    """Erstellt den gemeinsamen Verbindungspool für einen Lauf ([UPLOAD] POOL_SIZE)"""
+    pool_size = max(mySqlConfig.getint('UPLOAD', 'POOL_SIZE', fallback=4), min_size)
+    return ConnectionPool(lambda: connect_to_mysql(mySqlConfig), pool_size)
+
+def begin_staging(mydb, mySqlConfig, table_name):
+    """Legt <table>_staging als leere Kopie der Live-Tabelle an und liefert ihren Namen"""
+    registry = get_schema_registry(mySqlConfig['MYSQL_SERVER']['DATABASE'])
+    staging_table_name = f"{table_name}{STAGING_SUFFIX}"
+    
+    mycursor = mydb.cursor()
+    registry.ensure_table(mycursor, table_name)
+    # Reste eines abgebrochenen Laufs verwerfen
+    registry.drop_table(mycursor, staging_table_name)
+    registry.copy_table(mycursor, table_name, staging_table_name)
+    # Sekundärindizes erst nach dem Laden aufbauen, damit die Inserts sie nicht pflegen müssen
+    registry.drop_secondary_indexes(mycursor, staging_table_name)
+    mycursor.close()
+    
+    return staging_table_name
+
+def publish_staging(mydb, mySqlConfig, table_name, extra_indexes=()):
+    """Baut die Sekundärindizes der geladenen Staging-Tabelle auf und tauscht sie
+    mit einem einzigen RENAME TABLE atomar gegen die Live-Tabelle"""
+    registry = get_schema_registry(mySqlConfig['MYSQL_SERVER']['DATABASE'])
+    staging_table_name = f"{table_name}{STAGING_SUFFIX}"
+    old_table_name = f"{table_name}{OLD_SUFFIX}"
+    
+    mycursor = mydb.cursor()
+    # Indizes der Live-Tabelle übernehmen und um die automatisch erkannten ergänzen
+    indexes = registry.existing_indexes(mycursor, table_name)
+    indexes += get_secondary_indexes(mySqlConfig, table_name, registry.columns(mycursor, staging_table_name))
+    registry.add_indexes(mycursor, staging_table_name, indexes + list(extra_indexes))
+    
+    registry.drop_table(mycursor, old_table_name)
+    registry.rename_tables(mycursor, [(table_name, old_table_name), (staging_table_name, table_name)])
+    registry.drop_table(mycursor, old_table_name)
+    mycursor.close()
+    
+    print(f"Tabelle '{table_name}' atomar durch neue Daten ersetzt")
+    
+def get_secondary_indexes(mySqlConfig, table_name, columns):
+    """id_*-Spalten sowie die in [INDEXES] pro Service konfigurierten Spalten"""
+    hot_columns = [column.strip() for column in mySqlConfig.get('INDEXES', table_name, fallback='').split(',') if column.strip()]
+    id_columns = [column for column in columns if column.startswith('id_')]
+    return list(dict.fromkeys(id_columns + hot_columns))
+
+def append_history(data_list, mydb, mySqlConfig, table_name, snapshot_time=None):
+    """Hängt alle Datensätze mit gemeinsamem Zeitstempel an die partitionierte Historientabelle an"""
+    registry = get_schema_registry(mySqlConfig['MYSQL_SERVER']['DATABASE'])
+    history_table_name = f"{table_name}{history.HISTORY_SUFFIX}"
+    snapshot_time = snapshot_time or datetime.now().replace(microsecond=0)
+
+    mycursor = mydb.cursor()
+    history.ensure_history_table(mycursor, registry, history_table_name)
+    history.ensure_partition(mycursor, registry, history_table_name, snapshot_time, history.get_partition_period(mySqlConfig))
+    history.drop_expired_partitions(mycursor, registry, history_table_name, history.get_retention_days(mySqlConfig), snapshot_time.date())
+    mycursor.close()
+
+    rows = [dict(item, **{history.SNAPSHOT_COLUMN: snapshot_time}) for item in data_list if isinstance(item, dict)]
+    process_data_list(rows, mydb, mySqlConfig, history_table_name, False)
+
+    # Beim ersten Lauf entstehen die Indizes erst nach dem Laden der Daten
+    mycursor = mydb.cursor()
+    columns = registry.columns(mycursor, history_table_name)
+    registry.add_indexes(mycursor, history_table_name, history.history_indexes(columns))
+    mycursor.close()
+
+def is_incremental_service(mySqlConfig, table_name):
+    services = mySqlConfig.get('INCREMENTAL', 'SERVICES', fallback='')
+    return table_name in [service.strip() for service in services.split(',')]
+
+def get_incremental_key(mySqlConfig, table_name):
+    """Schlüsselspalten eines Services, Standard ist die UEX-id"""
+    key = mySqlConfig.get('INCREMENTAL', f"KEY_{table_name}", fallback='id')
+    return [column.strip() for column in key.split(',') if column.strip()]
+
+def upsert_data_list(data_list, mydb, mySqlConfig, table_name):
+    """Schreibt nur neue und geänderte Datensätze per Upsert und löscht verschwundene.
+    Liefert die Anzahl eingefügter, geänderter, gelöschter und unveränderter Datensätze"""
+    database = mySqlConfig['MYSQL_SERVER']['DATABASE']
+    full_table_name = f"{database}.{table_name}"
+    registry = get_schema_registry(database)
+    key_columns = get_incremental_key(mySqlConfig, table_name)
+    batch_size = mySqlConfig.getint('UPLOAD', 'BATCH_SIZE', fallback=1000)
+    
+    mycursor = mydb.cursor()
+    ensure_table_columns(mycursor, registry, table_name, data_list)
+    ensure_incremental_schema(mycursor, registry, table_name, key_columns)
+    
+    # Schlüssel nach Spaltentyp vergleichen, damit Werte aus MySQL und aus dem JSON zusammenpassen
+    column_types = registry.columns(mycursor, table_name)
+    normalizers = [key_normalizer(column_types.get(column)) for column in key_columns]
+    
+    # Bekannte Schlüssel mit ihrem Inhalts-Hash laden
+    mycursor.execute(f"SELECT {', '.join(key_columns)}, {ROW_HASH_COLUMN} FROM {full_table_name}")
+    existing_rows = {}
+    for row in mycursor.fetchall():
+        key_values = row[:-1]
+        if None not in key_values:
+            existing_rows[row_key(key_values, normalizers)] = (key_values, row[-1])
+    
+    counts = {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+    changed_rows = []
+    seen_keys = set()
+    for item in data_list:
+        if not isinstance(item, dict):
+            continue
+        key_values = [item.get(column) for column in key_columns]
+        if None in key_values:
+            print(f"Datensatz ohne Schlüssel ({', '.join(key_columns)}) in '{table_name}' übersprungen")
+            continue
+        
+        key = row_key(key_values, normalizers)
+        seen_keys.add(key)
+        row_hash = compute_row_hash(item)
+        
+        if key not in existing_rows:
+            counts['inserted'] += 1
+        elif existing_rows[key][1] != row_hash:
+            counts['updated'] += 1
+        else:
+            counts['unchanged'] += 1
+            continue
+        changed_rows.append({**item, ROW_HASH_COLUMN: row_hash})
+    
+    columns, rows = TableProfile().profile_rows(changed_rows)
+    insert_rows(mycursor, full_table_name, columns, rows, batch_size, upsert=True)
+    
+    # Schlüssel, die in diesem Lauf geliefert (also upserted oder unverändert) wurden, nie löschen
+    stale_keys = existing_rows.keys() - seen_keys
+    deleted_keys = [existing_rows[key][0] for key in stale_keys]
+    counts['deleted'] = delete_rows_by_key(mycursor, full_table_name, key_columns, deleted_keys, batch_size)
+    
+    # Alle Änderungen eines Services werden gemeinsam sichtbar
+    mydb.commit()
+    
+    # Nach dem ersten Laden fehlende Sekundärindizes anlegen, danach ist das ein reiner Abgleich
+    registry.add_indexes(mycursor, table_name, get_secondary_indexes(mySqlConfig, table_name, registry.columns(mycursor, table_name)))
+    mycursor.close()
+    
+    print(f"Tabelle '{table_name}' inkrementell aktualisiert: {counts['inserted']} neu, {counts['updated']} geändert, "
+          f"{counts['deleted']} gelöscht, {counts['unchanged']} unverändert")
+    print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    return counts
+
+def ensure_incremental_schema(mycursor, registry, table_name, key_columns):
+    """Ergänzt die Hash-Spalte und einen eindeutigen Schlüssel für den inkrementellen Modus"""
+    full_table_name = registry.full_name(table_name)
+    registry.add_columns(mycursor, table_name, {ROW_HASH_COLUMN: 'CHAR(32)'})
+    
+    # Die UEX-id ist bereits Primärschlüssel
+    if key_columns == ['id']:
+        return
+    
+    index_name = f"uq_{'_'.join(key_columns)}"[:64]
+    mycursor.execute(f"SHOW INDEX FROM {full_table_name} WHERE Key_name = %s", (index_name,))
+    if not mycursor.fetchall():
+        try:
+            mycursor.execute(f"ALTER TABLE {full_table_name} ADD UNIQUE KEY {index_name} ({', '.join(key_columns)})")
+        except mysql.Error as e:
+            print(f"Fehler beim Anlegen des Schlüssels '{index_name}': {e}")
+
+def key_normalizer(column_type):
+    """Vergleichsform eines Schlüsselwerts passend zum Spaltentyp: Zahlen numerisch (DECIMAL auf seine
+    Nachkommastellen gerundet), Texte ohne Groß-/Kleinschreibung wie bei den _ci-Collations"""
+    parsed = parse_column_type(column_type) if column_type else ('other',)
+    if parsed[0] in ('int', 'bool'):
+        return lambda value: int(Decimal(str(value)))
+    if parsed[0] == 'decimal':
+        exponent = Decimal(1).scaleb(-parsed[2])
+        return lambda value: Decimal(str(value)).quantize(exponent)
+    if parsed[0] == 'float':
+        return float
+    if parsed[0] in ('varchar', 'text', 'enum'):
+        return lambda value: (value.decode('utf-8') if isinstance(value, (bytes, bytearray)) else str(value)).casefold()
+    return str
+
+def row_key(key_values, normalizers):
+    """Schlüssel eines Datensatzes, nicht umwandelbare Werte werden als Text verglichen"""
+    key = []
+    for value, normalize in zip(key_values, normalizers):
+        try:
+            key.append(normalize(value))
+        except (ValueError, TypeError, InvalidOperation):
+            key.append(str(value))
+    return tuple(key)
+
+def compute_row_hash(item):
+    """MD5 über den kanonisch serialisierten Datensatz"""
+    canonical = json.dumps(item, sort_keys=True, default=str)
+    return hashlib.md5(canonical.encode('utf-8'), usedforsecurity=False).hexdigest()
+
+def delete_rows_by_key(mycursor, full_table_name, key_columns, key_values_list, batch_size):
+    """Löscht Datensätze anhand ihrer Schlüssel in Batches und liefert die Anzahl"""
+    key_tuple = f"({', '.join(key_columns)})"
+    row_placeholder = f"({', '.join(['%s'] * len(key_columns))})"
     
-def process_data_list(data_list, mydb, mySqlConfig, table_name, clearTable):
-    """Verarbeitet eine Liste von Datenobjekten"""
+    deleted_count = 0
+    for start in range(0, len(key_values_list), batch_size):
+        batch = key_values_list[start:start + batch_size]
+        placeholders = ', '.join([row_placeholder] * len(batch))
+        params = [value for key_values in batch for value in key_values]
+        mycursor.execute(f"DELETE FROM {full_table_name} WHERE {key_tuple} IN ({placeholders})", params)
+        deleted_count += mycursor.rowcount
+    return deleted_count
+
+def process_data_list(data_list, mydb, mySqlConfig, table_name, clearTable, allow_shrink=False):
+    """Verarbeitet eine Liste von Datenobjekten; allow_shrink nur für eine frisch angelegte, leere Staging-Tabelle"""
     database = mySqlConfig['MYSQL_SERVER']['DATABASE']
     service_name = table_name
     full_table_name = f"{database}.{table_name}"
     
     mycursor = mydb.cursor()
     
-    # Erstelle Tabelle mit id als Primärschlüssel
-    mycursor.execute(f"CREATE TABLE IF NOT EXISTS {full_table_name} (id INT AUTO_INCREMENT PRIMARY KEY)")
+    # Ein Durchlauf liefert Spalten, Typprofile und fertige Zeilen-Tupel
+    profile = TableProfile()
+    columns, rows = profile.profile_rows(data_list)
     
-    # Hole alle vorhandenen Spalten der Tabelle
-    mycursor.execute(f"SHOW COLUMNS FROM {full_table_name}")
-    existing_columns = [column[0] for column in mycursor.fetchall()]
+    # Erstelle Tabelle und fehlende Spalten
+    ensure_table_columns(mycursor, get_schema_registry(database), table_name, data_list, profile, allow_shrink)
     
     # Leere die Tabelle vor dem Einfügen neuer Daten (Überschreiben)
     if clearTable:
         clear_table_data(mydb, full_table_name)
     
-    # Sammle alle möglichen Spalten aus allen Datenobjekten
-    all_columns = set()
-    for item in data_list:
-        if isinstance(item, dict):
-            all_columns.update(item.keys())
-    
-    # Erstelle dynamisch Felder basierend auf allen Daten
-    for column_name in all_columns:
-        if column_name not in existing_columns:
-            # Bestimme den MySQL-Datentyp basierend auf dem ersten Wert
-            column_type = determine_column_type(data_list, column_name)
-            
-            try:
-                mycursor.execute(f"ALTER TABLE {full_table_name} ADD COLUMN {column_name} {column_type}")
-                print(f"Spalte '{column_name}' ({column_type}) zur Tabelle '{service_name}' hinzugefügt")
-            except mysql.Error as e:
-                print(f"Fehler beim Hinzufügen der Spalte '{column_name}': {e}")
-    
-    # Füge alle Daten ein
-    inserted_count = 0
-    for item in data_list:
-        if isinstance(item, dict):
-            try:
-                # Erstelle INSERT-Statement dynamisch
-                columns = list(item.keys())
-                placeholders = ', '.join(['%s'] * len(columns))
-                column_names = ', '.join(columns)
-                
-                # Bereite Werte vor
-                values = prepare_values(item, columns)
-                
-                # Führe INSERT aus
-                insert_query = f"INSERT INTO {full_table_name} ({column_names}) VALUES ({placeholders})"
-                mycursor.execute(insert_query, values)
-                inserted_count += 1
-                
-            except mysql.Error as e:
-                print(f"Fehler beim Einfügen von Daten: {e}")
+    inserted_count = load_rows(mycursor, mySqlConfig, full_table_name, service_name, columns, rows)
     
     mydb.commit()
     mycursor.close()
@@ -103,35 +400,50 @@ def process_data_list(data_list, mydb, mySqlConfig, table_name, clearTable):
     print(f"{inserted_count} Datensätze erfolgreich in Tabelle '{service_name}' eingefügt (Daten überschrieben)")
     print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
-def process_single_data(data, mydb, mySqlConfig, table_name):
+def load_rows(mycursor, mySqlConfig, full_table_name, service_name, columns, rows):
+    """Schreibt Zeilen-Tupel per LOAD DATA oder gebündelten INSERTs und liefert ihre Anzahl"""
+    # Große Services per LOAD DATA, sonst (oder wenn der Server es ablehnt) gebündelte INSERTs
+    inserted_count = None
+    if is_bulk_load_service(mySqlConfig, service_name):
+        inserted_count = bulk_load_rows(mycursor, full_table_name, columns, rows, get_bulk_load_dir(mySqlConfig))
+    
+    if inserted_count is None:
+        batch_size = mySqlConfig.getint('UPLOAD', 'BATCH_SIZE', fallback=1000)
+        inserted_count = insert_rows(mycursor, full_table_name, columns, rows, batch_size)
+    return inserted_count
+
+def ensure_table_columns(mycursor, registry, table_name, data_list, profile=None, allow_shrink=False):
+    """Legt die Tabelle an, falls nötig, ergänzt alle Spalten der Datenobjekte und verbreitert zu kleine
+    Spaltentypen. Deutlich zu große werden nur mit allow_shrink verkleinert, also nur solange die Tabelle
+    noch leer ist. Liefert das Profil der Daten"""
+    # Erstelle Tabelle mit id als Primärschlüssel, bekannte Tabellen kosten keine Abfrage
+    registry.ensure_table(mycursor, table_name)
+    
+    # Ein Durchlauf über alle Datenobjekte sammelt Spalten und Wertprofile
+    profile = profile or TableProfile(data_list)
+    registry.update_columns(mycursor, table_name, profile.columns,
+                            lambda column, current_type: resolve_column_type(current_type, profile.columns[column], allow_shrink))
+    return profile
+
+def process_single_data(data, mydb, mySqlConfig, table_name, clearTable=True, allow_shrink=False):
     """Verarbeitet ein einzelnes Datenobjekt"""
     database = mySqlConfig['MYSQL_SERVER']['DATABASE']
     service_name = table_name
     full_table_name = f"{database}.{table_name}"
     
     mycursor = mydb.cursor()
+    registry = get_schema_registry(database)
     
     # Erstelle Tabelle mit id als Primärschlüssel
-    mycursor.execute(f"CREATE TABLE IF NOT EXISTS {full_table_name} (id INT AUTO_INCREMENT PRIMARY KEY)")
-    
-    # Hole alle vorhandenen Spalten der Tabelle
-    mycursor.execute(f"SHOW COLUMNS FROM {full_table_name}")
-    existing_columns = [column[0] for column in mycursor.fetchall()]
+    registry.ensure_table(mycursor, table_name)
     
     # Leere die Tabelle vor dem Einfügen neuer Daten (Überschreiben)
-    clear_table_data(mydb, full_table_name)
+    if clearTable:
+        clear_table_data(mydb, full_table_name)
     
     if isinstance(data, dict):
-        # Erstelle dynamisch Felder basierend auf den Daten
-        for key, value in data.items():
-            if key not in existing_columns:
-                column_type = determine_single_column_type(value)
-                
-                try:
-                    mycursor.execute(f"ALTER TABLE {full_table_name} ADD COLUMN {key} {column_type}")
-                    print(f"Spalte '{key}' ({column_type}) zur Tabelle '{service_name}' hinzugefügt")
-                except mysql.Error as e:
-                    print(f"Fehler beim Hinzufügen der Spalte '{key}': {e}")
+        # Erstelle dynamisch Felder basierend auf den Daten, alle in einem ALTER TABLE
+        ensure_table_columns(mycursor, registry, table_name, [data], allow_shrink=allow_shrink)
         
         # Erstelle INSERT-Statement dynamisch
         columns = list(data.keys())
@@ -150,6 +462,103 @@ def process_single_data(data, mydb, mySqlConfig, table_name):
         
         print(f"Daten erfolgreich in Tabelle '{service_name}' eingefügt (Daten überschrieben)")
 
+def insert_rows(mycursor, full_table_name, columns, rows, batch_size, upsert=False):
+    """Fügt Zeilen-Tupel in Spaltenreihenfolge per executemany in Batches ein"""
+    if not columns:
+        return 0
+    
+    insert_query = build_insert_query(full_table_name, columns, upsert)
+    inserted_count = 0
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        try:
+            # mysql.connector fasst executemany bei INSERT zu einem mehrzeiligen VALUES zusammen
+            mycursor.executemany(insert_query, batch)
+            inserted_count += len(batch)
+        except mysql.Error as e:
+            # Der fehlgeschlagene Batch wurde komplett zurückgerollt, einzeln nachholen
+            print(f"Fehler beim Batch-Insert, füge {len(batch)} Datensätze einzeln ein: {e}")
+            inserted_count += insert_rows_individually(mycursor, full_table_name, columns, batch, upsert)
+    
+    return inserted_count
+
+def insert_rows_individually(mycursor, full_table_name, columns, rows, upsert=False):
+    """Fügt vorbereitete Zeilen einzeln ein und meldet Fehler pro Datensatz"""
+    insert_query = build_insert_query(full_table_name, columns, upsert)
+    inserted_count = 0
+    for values in rows:
+        try:
+            mycursor.execute(insert_query, values)
+            inserted_count += 1
+        except mysql.Error as e:
+            print(f"Fehler beim Einfügen von Daten: {e}")
+    return inserted_count
+
+def build_insert_query(full_table_name, columns, upsert=False):
+    """Erstellt ein INSERT-Statement mit Platzhaltern, optional als Upsert"""
+    placeholders = ', '.join(['%s'] * len(columns))
+    column_names = ', '.join(columns)
+    insert_query = f"INSERT INTO {full_table_name} ({column_names}) VALUES ({placeholders})"
+    if upsert:
+        # VALUES() statt Alias, damit auch MariaDB und ältere MySQL-Versionen funktionieren
+        updates = ', '.join(f"{column} = VALUES({column})" for column in columns)
+        insert_query += f" ON DUPLICATE KEY UPDATE {updates}"
+    return insert_query
+
+def get_bulk_load_services(mySqlConfig):
+    services = mySqlConfig.get('UPLOAD', 'BULK_LOAD_SERVICES', fallback='')
+    return [service.strip() for service in services.split(',') if service.strip()]
+
+def is_bulk_load_service(mySqlConfig, table_name):
+    return table_name.removesuffix(STAGING_SUFFIX) in get_bulk_load_services(mySqlConfig)
+
+def bulk_load_rows(mycursor, full_table_name, columns, rows, bulk_load_dir):
+    """Lädt Zeilen-Tupel über eine temporäre TSV-Datei per LOAD DATA LOCAL INFILE.
+    Liefert die Anzahl geladener Zeilen oder None, wenn LOAD DATA nicht verfügbar ist"""
+    mycursor.execute("SELECT @@GLOBAL.local_infile")
+    if not mycursor.fetchone()[0]:
+        print("local_infile ist auf dem Server deaktiviert, verwende INSERT")
+        return None
+    
+    if not columns:
+        return 0
+    
+    # Zeilen direkt in die Datei streamen, fehlende Spalten sind bereits None und werden zu NULL
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', newline='', suffix='.tsv', dir=bulk_load_dir, delete=False) as tsv_file:
+        for row in rows:
+            tsv_file.write('\t'.join(escape_tsv_value(value) for value in row))
+            tsv_file.write('\n')
+    
+    try:
+        mycursor.execute(
+            f"LOAD DATA LOCAL INFILE %s INTO TABLE {full_table_name} CHARACTER SET utf8mb4 "
+            "FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' "
+            f"({', '.join(columns)})",
+            (tsv_file.name,)
+        )
+        loaded_count = mycursor.rowcount
+        if mycursor.warning_count:
+            print(f"LOAD DATA für '{full_table_name}' meldete {mycursor.warning_count} Warnungen")
+        return loaded_count
+    except mysql.Error as e:
+        print(f"LOAD DATA fehlgeschlagen, verwende INSERT: {e}")
+        return None
+    finally:
+        os.remove(tsv_file.name)
+
+def escape_tsv_value(value):
+    """Wandelt einen Wert in das Feldformat von LOAD DATA um (\\N für NULL, Escapes mit Backslash)"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    else:
+        value = str(value)
+    return (value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+            .replace('\r', '\\r').replace('\0', '\\0'))
+
 def clear_table_data(mydb, table_name):
     """Leert eine Tabelle ohne die Verbindung zu schließen"""
     cursor = mydb.cursor()
@@ -178,49 +587,6 @@ def clear_table_data(mydb, table_name):
     
     cursor.close()
 
-def determine_column_type(data_list, column_name):
-    """Bestimmt den MySQL-Datentyp basierend auf allen Werten einer Spalte"""
-    types_found = set()
-    
-    for item in data_list:
-        if isinstance(item, dict) and column_name in item:
-            value = item[column_name]
-            if isinstance(value, int):
-                types_found.add('int')
-            elif isinstance(value, float):
-                types_found.add('float')
-            elif isinstance(value, bool):
-                types_found.add('bool')
-            elif isinstance(value, (dict, list)):
-                types_found.add('json')
-            else:
-                types_found.add('text')
-    
-    # Priorisiere Datentypen
-    if 'json' in types_found:
-        return "JSON"
-    elif 'float' in types_found:
-        return "DECIMAL(15,2)"
-    elif 'int' in types_found:
-        return "INT"
-    elif 'bool' in types_found:
-        return "BOOLEAN"
-    else:
-        return "TEXT"
-
-def determine_single_column_type(value):
-    """Bestimmt den MySQL-Datentyp für einen einzelnen Wert"""
-    if isinstance(value, int):
-        return "INT"
-    elif isinstance(value, float):
-        return "DECIMAL(15,2)"
-    elif isinstance(value, bool):
-        return "BOOLEAN"
-    elif isinstance(value, (dict, list)):
-        return "JSON"
-    else:
-        return "TEXT"
-
 def prepare_values(data_dict, columns):
     """Bereitet Werte für INSERT vor"""
     values = []